@@ -4,6 +4,8 @@ import logging
 from pathlib import Path
 
 from src.core import FileMerger
+from src.core.sharding import parse_shard
+from src.core.transforms import TRANSFORMS
 from src.utils import get_logger, setup_logging
 
 setup_logging(console_level=logging.INFO)
@@ -42,19 +44,108 @@ def main():
         action="store_false",
         help="Generate a project tree structure file.",
     )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Write a byte-offset section index next to each output file.",
+    )
+    parser.add_argument(
+        "--symbols",
+        action="store_true",
+        help="Write an index of the symbols defined in each output next to it.",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=float,
+        metavar="MB",
+        help="Roll output over to a new part file every MB megabytes.",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Only report file counts, sizes and estimated tokens; write nothing.",
+    )
+    parser.add_argument(
+        "--estimate-sniff",
+        action="store_true",
+        help="With --estimate, also read file prefixes to find generated files.",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="K/N",
+        help="Process only shard K of N and write a partial output for --merge-shards.",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Combine the partial outputs of all shards into the regular outputs.",
+    )
+    parser.add_argument(
+        "--transform",
+        action="append",
+        choices=list(TRANSFORMS),
+        metavar="NAME",
+        help="Apply a content transform (repeatable); overrides config.json.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Journal finished files so that an interrupted run can be resumed.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its checkpoint (implies --checkpoint).",
+    )
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument(
+        "--budget-tokens",
+        type=int,
+        metavar="N",
+        help="Keep only the most relevant files fitting in about N tokens.",
+    )
+    budget.add_argument(
+        "--budget-bytes",
+        type=int,
+        metavar="N",
+        help="Keep only the most relevant files fitting in N bytes.",
+    )
 
     args = parser.parse_args()
 
     path = args.project_path or get_project_path()
+    budget = None
+    if args.budget_tokens is not None:
+        budget = (args.budget_tokens, "tokens")
+    elif args.budget_bytes is not None:
+        budget = (args.budget_bytes, "bytes")
 
     merger = FileMerger(
         project_path=path,
         merge_onefile=args.onefile,
         enable_timestamp=args.timestamp,
         enable_folder_structure=args.no_tree,
+        enable_section_index=args.index,
+        enable_symbol_index=args.symbols,
+        max_output_size_mb=args.max_size,
+        shard=args.shard,
+        budget=budget,
+        transforms=args.transform,
+        enable_checkpoint=args.checkpoint,
+        resume=args.resume,
         logger=logger,
     )
-    asyncio.run(merger.merge_files())
+    try:
+        if args.estimate:
+            report = asyncio.run(merger.estimate(sniff_generated=args.estimate_sniff))
+            print(report.format())
+        elif args.merge_shards:
+            asyncio.run(merger.merge_shards())
+        else:
+            asyncio.run(merger.merge_files())
+    finally:
+        merger.close()
 
 
 if __name__ == "__main__":
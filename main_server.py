@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from src.server import MergeService
+from src.utils import get_logger, setup_logging
+
+setup_logging(console_level=logging.INFO)
+logger = get_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a local merge service that keeps project caches warm."
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        help="Listen on this Unix domain socket instead of TCP.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Host to listen on (default: 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Port to listen on (default: 8765).",
+    )
+    parser.add_argument(
+        "--max-io",
+        type=int,
+        default=64,
+        help="Maximum number of concurrent file reads across all requests.",
+    )
+
+    args = parser.parse_args()
+
+    service = MergeService(logger=logger, max_concurrent_io=args.max_io)
+    try:
+        if args.socket:
+            asyncio.run(service.serve_unix(args.socket))
+        else:
+            asyncio.run(service.serve_tcp(args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -51,6 +51,13 @@ class Config:
         ]
         self.output_dir = ".output-md"
         self.max_workers = 4
+        self.max_output_size_mb = 0
+        self.zero_copy = True
+        self.fallback_encoding = None
+        self.skip_generated = True
+        self.transforms = []
+        self.redact_secrets = True
+        self.redaction_rules = []
 
         self.load_config()
 
@@ -65,6 +72,17 @@ class Config:
                 self.exclude_folders = data.get("exclude_folders", self.exclude_folders)
                 self.output_dir = data.get("output_folder", self.output_dir)
                 self.max_workers = data.get("max_workers", self.max_workers)
+                self.max_output_size_mb = data.get(
+                    "max_output_size_mb", self.max_output_size_mb
+                )
+                self.zero_copy = data.get("zero_copy", self.zero_copy)
+                self.fallback_encoding = data.get(
+                    "fallback_encoding", self.fallback_encoding
+                )
+                self.skip_generated = data.get("skip_generated", self.skip_generated)
+                self.transforms = data.get("transforms", self.transforms)
+                self.redact_secrets = data.get("redact_secrets", self.redact_secrets)
+                self.redaction_rules = data.get("redaction_rules", self.redaction_rules)
             self.logger.info("Configuration loaded successfully")
         else:
             self.logger.warning(
@@ -83,6 +101,13 @@ class Config:
                     "exclude_folders": self.exclude_folders,
                     "output_folder": self.output_dir,
                     "max_workers": self.max_workers,
+                    "max_output_size_mb": self.max_output_size_mb,
+                    "zero_copy": self.zero_copy,
+                    "fallback_encoding": self.fallback_encoding,
+                    "skip_generated": self.skip_generated,
+                    "transforms": self.transforms,
+                    "redact_secrets": self.redact_secrets,
+                    "redaction_rules": self.redaction_rules,
                 },
                 f,
                 indent=4,
@@ -1,15 +1,43 @@
 from .file_merger import FileMerger
+from .checkpoint import Checkpoint
 from .doc_generator import (
     generate_content,
     generate_tree_structure,
     generate_onefile_content,
+    generate_content_sections,
+    generate_onefile_sections,
+    MarkdownRenderer,
+    RenderedSection,
+    SectionTemplate,
+    FOLDER_TEMPLATE,
+    ONEFILE_TEMPLATE,
 )
+from .estimator import EstimateReport
 from .file_processor import FileProcessor
+from .file_record import FileRecord
+from .output_state import OutputState
+from .project_cache import ProjectCache
+from .section_index import SectionIndex
+from .symbol_index import SymbolIndex
 
 __all__ = [
     "FileMerger",
+    "Checkpoint",
     "generate_content",
     "generate_tree_structure",
     "generate_onefile_content",
+    "generate_content_sections",
+    "generate_onefile_sections",
+    "MarkdownRenderer",
+    "RenderedSection",
+    "SectionTemplate",
+    "FOLDER_TEMPLATE",
+    "ONEFILE_TEMPLATE",
+    "EstimateReport",
     "FileProcessor",
+    "FileRecord",
+    "OutputState",
+    "ProjectCache",
+    "SectionIndex",
+    "SymbolIndex",
 ]
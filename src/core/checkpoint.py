@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import aiofiles
+
+from .file_record import FileRecord
+from .splice import SplicedSection
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_DIR = ".checkpoint"
+# Completed sections are buffered and appended to the journal this often
+FLUSH_INTERVAL = 5.0
+# Files decoded per batch, so that finished sections reach the journal early
+CHECKPOINT_BATCH_SIZE = 1024
+
+Section = Union[str, SplicedSection]
+
+
+class Checkpoint:
+    """
+    A journal of the file sections a run has finished.
+
+    Rendered sections are appended to ``sections.bin`` and described by one
+    JSON line each in ``journal.jsonl``; spliced sections only record where
+    their body lives in the source file. The section bytes of a batch are
+    always written before the journal lines that point at them, so a run
+    stopped at any moment leaves a consistent journal behind. A resumed run
+    takes a file's section from the journal when the file's size and
+    modification time still match, without reading the file again.
+    """
+
+    def __init__(self, directory: Path, settings: dict, logger: logging.Logger):
+        """
+        Initialize the Checkpoint class.
+
+        :param directory: Folder holding the journal of this run
+        :param settings: Options that change how sections are rendered; a
+            journal written with other settings is discarded
+        :param logger: Logger object
+        """
+        self.directory = directory
+        self.journal_path = directory / "journal.jsonl"
+        self.sections_path = directory / "sections.bin"
+        self.settings = settings
+        self.logger = logger
+        # Relative POSIX path -> journal entry
+        self.entries: Dict[str, list] = {}
+        self.resumed = 0
+        self._offset = 0
+        self._pending_lines: List[str] = []
+        self._pending_data: List[bytes] = []
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def open(self, resume: bool):
+        """
+        Load the journal of a previous run, or start a new one.
+
+        :param resume: Reuse the sections journaled by a previous run
+        """
+        if resume:
+            self.entries = await self._load()
+            if self.entries:
+                self.logger.info(
+                    f"Resuming from checkpoint: {len(self.entries)} files done"
+                )
+            else:
+                self.logger.info("No usable checkpoint found, starting over")
+        if not self.entries:
+            await asyncio.to_thread(shutil.rmtree, self.directory, True)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            header = {"version": CHECKPOINT_VERSION, "settings": self.settings}
+            async with aiofiles.open(self.journal_path, "w", encoding="utf-8") as f:
+                await f.write(json.dumps(header) + "\n")
+            async with aiofiles.open(self.sections_path, "wb"):
+                pass
+        self._offset = self.sections_path.stat().st_size
+
+    async def _load(self) -> Dict[str, list]:
+        """Read the journal entries, keeping the last one of every file."""
+        try:
+            async with aiofiles.open(self.journal_path, "r", encoding="utf-8") as f:
+                lines = (await f.read()).splitlines()
+            size = self.sections_path.stat().st_size
+        except OSError:
+            return {}
+
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return {}
+        if header != {"version": CHECKPOINT_VERSION, "settings": self.settings}:
+            self.logger.info("Checkpoint was written with other settings")
+            return {}
+
+        entries: Dict[str, list] = {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash
+                continue
+            if entry[0] == "data" and entry[4] + entry[5] > size:
+                continue
+            entries[entry[1]] = entry
+        return entries
+
+    def lookup(self, record: FileRecord) -> Optional[SplicedSection]:
+        """
+        Return the journaled section of a file that has not changed since.
+
+        :param record: Record of the file
+        :return: Section spliced from the journal or the source file, or None
+        """
+        entry = self.entries.get(record.path.as_posix())
+        if entry is None or entry[2] != record.size or entry[3] != record.mtime:
+            return None
+        self.resumed += 1
+        if entry[0] == "data":
+            _, _, _, _, offset, length, newlines, digest = entry
+            return SplicedSection(
+                source=self.sections_path,
+                prefix=b"",
+                start=offset,
+                end=offset + length,
+                suffix=b"",
+                newlines=newlines,
+                digest=digest,
+            )
+        _, _, _, _, start, end, newlines, digest, prefix, suffix = entry
+        return SplicedSection(
+            source=record.source,
+            prefix=prefix.encode("utf-8"),
+            start=start,
+            end=end,
+            suffix=suffix.encode("utf-8"),
+            newlines=newlines,
+            digest=digest,
+        )
+
+    def add(self, record: FileRecord, section: Section):
+        """Journal the finished section of a file."""
+        head = [record.path.as_posix(), record.size, record.mtime]
+        if isinstance(section, SplicedSection):
+            entry = [
+                "spliced",
+                *head,
+                section.start,
+                section.end,
+                section.newlines,
+                section.digest,
+                section.prefix.decode("utf-8"),
+                section.suffix.decode("utf-8"),
+            ]
+        else:
+            data = section.encode("utf-8")
+            entry = [
+                "data",
+                *head,
+                self._offset,
+                len(data),
+                data.count(b"\n"),
+                hashlib.sha1(data).hexdigest(),
+            ]
+            self._pending_data.append(data)
+            self._offset += len(data)
+        self._pending_lines.append(json.dumps(entry) + "\n")
+
+    async def maybe_flush(self):
+        """Flush the journal if the flush interval has passed."""
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            await self.flush()
+
+    async def flush(self):
+        """Append the buffered sections and their journal lines to disk."""
+        self._last_flush = time.monotonic()
+        # Batches have to reach sections.bin in the order their offsets were given
+        async with self._lock:
+            if not self._pending_lines:
+                return
+            data, self._pending_data = self._pending_data, []
+            lines, self._pending_lines = self._pending_lines, []
+            async with aiofiles.open(self.sections_path, "ab") as f:
+                await f.writelines(data)
+            async with aiofiles.open(self.journal_path, "a", encoding="utf-8") as f:
+                await f.writelines(lines)
+
+    async def remove(self):
+        """Delete the journal once the run has completed."""
+        self._pending_data, self._pending_lines = [], []
+        await asyncio.to_thread(shutil.rmtree, self.directory, True)
+        try:
+            self.directory.parent.rmdir()
+        except OSError:
+            # Checkpoints of other runs are still there
+            pass
@@ -1,6 +1,11 @@
-import asyncio
+import io
+import re
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+from .file_record import FileRecord
+
+BACKTICK_RUN = re.compile("`{3,}")
 
 
 async def generate_tree_structure(files: List[Path], project_path: Path) -> str:
@@ -40,65 +45,195 @@ async def generate_tree_structure(files: List[Path], project_path: Path) -> str:
     return "\n".join(content)
 
 
-async def generate_content(
-    folder_path: Path, files: List[Tuple[Path, str, str]]
-) -> str:
+class RenderedSection:
+    """A file section rendered for consumers that don't go through output files."""
+
+    __slots__ = ("path", "language", "content", "markdown")
+
+    def __init__(self, path: Path, language: str, content: str, markdown: str):
+        """
+        Initialize the RenderedSection class.
+
+        :param path: Path of the file relative to the project
+        :param language: Code fence language (the file extension)
+        :param content: Decoded file content
+        :param markdown: Rendered markdown section
+        """
+        self.path = path
+        self.language = language
+        self.content = content
+        self.markdown = markdown
+
+    def __repr__(self) -> str:
+        return f"RenderedSection({str(self.path)!r}, language={self.language!r})"
+
+
+class SectionTemplate:
     """
-    Asynchronously generates content for each folder.
+    Describes the layout of a generated document.
 
-    :param folder_path: Path of the folder
-    :param files: List of files in the folder (file path, extension, file content)
-    :param project_path: Root path of the project
-    :return: Generated document content
+    ``header`` is formatted with ``folder`` (the folder path) and
+    ``folder_name`` (its last component); ``heading`` with ``path`` (the file
+    path shown for a section).
     """
-    folder_name = Path(folder_path)
-
-    async def process_file(file_path: Path, extension: str, file_content: str) -> str:
-        content = []
-        content.append(f"## {folder_name / file_path.name}")
-        content.append(f"```{extension}")
-        content.append(file_content.strip())
-        content.append("```\n")
-        return "\n".join(content)
-
-    content = [f"# {folder_name} Contents"]
-
-    # Process each file asynchronously
-    file_contents = await asyncio.gather(
-        *[
-            process_file(file_path, extension, file_content)
-            for file_path, extension, file_content in sorted(files)
+
+    __slots__ = ("header", "heading")
+
+    def __init__(self, header: str, heading: str = "## {path}"):
+        self.header = header
+        self.heading = heading
+
+
+FOLDER_TEMPLATE = SectionTemplate(header="# {folder} Contents")
+ONEFILE_TEMPLATE = SectionTemplate(header="# {folder_name} Project Contents")
+
+
+def fence_for(content: str) -> str:
+    """Return a code fence longer than any backtick run in the content."""
+    longest = max((len(run) for run in BACKTICK_RUN.findall(content)), default=0)
+    return "`" * max(3, longest + 1)
+
+
+class MarkdownRenderer:
+    """A single-pass renderer turning processed files into markdown documents."""
+
+    def __init__(self, template: SectionTemplate = FOLDER_TEMPLATE):
+        """
+        Initialize the MarkdownRenderer class.
+
+        :param template: Layout of the document header and file sections
+        """
+        self.template = template
+
+    def header(self, folder_path: Path) -> str:
+        """Return the header line of the document for the given folder."""
+        return self.template.header.format(
+            folder=folder_path, folder_name=folder_path.name
+        )
+
+    def frame(
+        self, file_path: Path, extension: str, fence: str = "```"
+    ) -> Tuple[str, str]:
+        """
+        Return the text placed before and after a file's stripped content.
+
+        :param file_path: File path shown in the section heading
+        :param extension: File extension used as the code fence language
+        :param fence: Code fence delimiter
+        :return: (prefix, suffix) surrounding the content
+        """
+        heading = self.template.heading.format(path=file_path)
+        return f"{heading}\n{fence}{extension}\n", f"\n{fence}\n"
+
+    def render_section(self, file_path: Path, extension: str, content: str) -> str:
+        """Render the section of a single file."""
+        content = content.strip()
+        prefix, suffix = self.frame(file_path, extension, fence_for(content))
+        return f"{prefix}{content}{suffix}"
+
+    def sections(
+        self,
+        files: Iterable[FileRecord],
+        relative_to: Path = Path("."),
+    ) -> List[Tuple[Path, str]]:
+        """
+        Render the sections of the given files, ordered by file path.
+
+        :param files: Loaded file records to render
+        :param relative_to: Path the file paths are shown relative to
+        :return: List of (file path, section content)
+        """
+        return [
+            (
+                record.path,
+                self.render_section(
+                    record.path.relative_to(relative_to),
+                    record.extension,
+                    record.content,
+                ),
+            )
+            for record in sorted(files, key=_file_path_key)
         ]
-    )
 
-    content.extend(file_contents)
+    def render(
+        self,
+        folder_path: Path,
+        files: Iterable[FileRecord],
+        out: Optional[TextIO] = None,
+        relative_to: Path = Path("."),
+    ) -> TextIO:
+        """
+        Render a whole document into a writer in a single pass.
+
+        :param folder_path: Path of the folder the document is about
+        :param files: Loaded file records to render
+        :param out: Writer to render into; a new StringIO if omitted
+        :param relative_to: Path the file paths are shown relative to
+        :return: The writer the document was rendered into
+        """
+        if out is None:
+            out = io.StringIO()
+        out.write(self.header(folder_path))
+        for _, section in self.sections(files, relative_to):
+            out.write("\n")
+            out.write(section)
+        return out
+
+
+def _file_path_key(record: FileRecord) -> Path:
+    """Sort key that never compares file contents."""
+    return record.path
+
+
+_folder_renderer = MarkdownRenderer(FOLDER_TEMPLATE)
+_onefile_renderer = MarkdownRenderer(ONEFILE_TEMPLATE)
+
+
+async def generate_content_sections(
+    folder_path: Path, files: List[FileRecord]
+) -> Tuple[str, List[Tuple[Path, str]]]:
+    """
+    Generates the header and per-file sections of a folder document.
 
-    return "\n".join(content)
+    :param folder_path: Path of the folder
+    :param files: Loaded file records of the files in the folder
+    :return: Document header and list of (file path, section content)
+    """
+    return _folder_renderer.header(folder_path), _folder_renderer.sections(files)
 
 
-async def generate_onefile_content(
-    folder_path: Path, files: List[Tuple[Path, str, str]]
-) -> str:
-    """Generate content for a single file containing all processed files asynchronously.
+async def generate_content(folder_path: Path, files: List[FileRecord]) -> str:
+    """
+    Generates content for each folder.
 
     :param folder_path: Path of the folder
-    :param files: List of files in the folder (file path, extension, file content)
-    :param project_path: Root path of the project
+    :param files: Loaded file records of the files in the folder
     :return: Generated document content
     """
-    content = [f"# {folder_path.name} Project Contents"]
+    return _folder_renderer.render(folder_path, files).getvalue()
 
-    async def process_file(file_path: Path, extension: str, file_content: str) -> str:
-        relative_path = file_path.relative_to(folder_path)
-        return f"## {relative_path}\n```{extension}\n{file_content.strip()}\n```\n"
 
-    # Process each file asynchronously
-    file_contents = await asyncio.gather(
-        *[
-            process_file(file_path, extension, file_content)
-            for file_path, extension, file_content in sorted(files)
-        ]
+async def generate_onefile_sections(
+    folder_path: Path, files: List[FileRecord]
+) -> Tuple[str, List[Tuple[Path, str]]]:
+    """Generate the header and per-file sections of the single merged document.
+
+    :param folder_path: Path of the folder
+    :param files: Loaded file records of the files in the folder
+    :return: Document header and list of (file path, section content)
+    """
+    return _onefile_renderer.header(folder_path), _onefile_renderer.sections(
+        files, relative_to=folder_path
     )
 
-    content.extend(file_contents)
-    return "\n".join(content)
+
+async def generate_onefile_content(folder_path: Path, files: List[FileRecord]) -> str:
+    """Generate content for a single file containing all processed files.
+
+    :param folder_path: Path of the folder
+    :param files: Loaded file records of the files in the folder
+    :return: Generated document content
+    """
+    return _onefile_renderer.render(
+        folder_path, files, relative_to=folder_path
+    ).getvalue()
@@ -0,0 +1,108 @@
+import heapq
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .file_record import FileRecord
+
+# Rough average for source code with common LLM tokenizers
+BYTES_PER_TOKEN = 4
+
+
+def estimate_tokens(size: int) -> int:
+    """Estimate the number of tokens for the given number of bytes."""
+    return (size + BYTES_PER_TOKEN - 1) // BYTES_PER_TOKEN
+
+
+class EstimateTotals:
+    """File count and byte total of a group of files."""
+
+    __slots__ = ("files", "bytes")
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, size: int):
+        self.files += 1
+        self.bytes += size
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.bytes)
+
+
+class EstimateReport:
+    """
+    A summary of what a run would produce, built from file metadata only.
+    """
+
+    def __init__(self, top_n: int = 10):
+        """
+        Initialize the EstimateReport class.
+
+        :param top_n: Number of largest files to keep
+        """
+        self.top_n = top_n
+        self.total = EstimateTotals()
+        self.by_folder: Dict[Path, EstimateTotals] = defaultdict(EstimateTotals)
+        self.by_extension: Dict[str, EstimateTotals] = defaultdict(EstimateTotals)
+        self.excluded: Dict[str, EstimateTotals] = defaultdict(EstimateTotals)
+        self._largest: List[Tuple[int, str]] = []
+        self.notes: List[str] = []
+
+    def add_file(self, record: FileRecord):
+        """Account for a file that would be included in the output."""
+        self.total.add(record.size)
+        self.by_folder[record.folder].add(record.size)
+        self.by_extension[record.extension or "(none)"].add(record.size)
+        entry = (record.size, record.path.as_posix())
+        if len(self._largest) < self.top_n:
+            heapq.heappush(self._largest, entry)
+        else:
+            heapq.heappushpop(self._largest, entry)
+
+    def add_excluded(self, reason: str, size: int):
+        """Account for a file excluded by the given rule."""
+        self.excluded[reason].add(size)
+
+    @property
+    def largest(self) -> List[Tuple[int, str]]:
+        """The largest included files as (size, path), biggest first."""
+        return sorted(self._largest, reverse=True)
+
+    @staticmethod
+    def _table(title: str, rows: Dict, key_name: str) -> List[str]:
+        lines = [
+            f"## {title}",
+            f"{key_name:<40} {'files':>8} {'bytes':>14} {'~tokens':>12}",
+        ]
+        for key, totals in sorted(rows.items(), key=lambda item: -item[1].bytes):
+            lines.append(
+                f"{str(key):<40} {totals.files:>8} {totals.bytes:>14,} "
+                f"{totals.tokens:>12,}"
+            )
+        return lines
+
+    def format(self) -> str:
+        """Format the report as plain text."""
+        lines = [
+            "# Estimate",
+            f"Files: {self.total.files:,}",
+            f"Bytes: {self.total.bytes:,}",
+            f"Estimated tokens: {self.total.tokens:,}",
+            "",
+        ]
+        lines += self._table("By folder", self.by_folder, "folder")
+        lines.append("")
+        lines += self._table("By extension", self.by_extension, "extension")
+        lines.append("")
+        lines.append(f"## Largest files (top {self.top_n})")
+        for size, path in self.largest:
+            lines.append(f"{path:<60} {size:>14,} {estimate_tokens(size):>12,}")
+        lines.append("")
+        lines += self._table("Excluded", self.excluded, "rule")
+        if self.notes:
+            lines.append("")
+            lines += [f"Note: {note}" for note in self.notes]
+        return "\n".join(lines)
@@ -1,20 +1,45 @@
 import asyncio
 import logging
+from collections import Counter
+from concurrent.futures import Executor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 import aiofiles
 
 from src.config import Config
-from src.utils import GitIgnoreParser
+from src.utils import GeneratedFileDetector, GitIgnoreParser
+from src.utils.generated_detector import MIN_SNIFF_SIZE
 
+from .checkpoint import CHECKPOINT_BATCH_SIZE, CHECKPOINT_DIR, Checkpoint
 from .doc_generator import (
-    generate_content,
+    generate_content_sections,
     generate_tree_structure,
-    generate_onefile_content,
+    generate_onefile_sections,
+    MarkdownRenderer,
+    RenderedSection,
+    FOLDER_TEMPLATE,
+    ONEFILE_TEMPLATE,
 )
-from .file_processor import FileProcessor
+from .file_processor import SMALL_FILE_BATCH_SIZE, SMALL_FILE_SIZE, FileProcessor
+from .estimator import EstimateReport
+from .file_record import FileRecord
+from .output_state import OutputState
+from .output_writer import OutputWriter
+from .redaction import Redactor
+from .section_index import SectionIndex
+from .selection import select_records
+from .sharding import ShardManifest, shard_of
+from .splice import SplicedSection, scan_file
+from .transforms import TransformPipeline
+
+if TYPE_CHECKING:
+    from .project_cache import ProjectCache
+
+
+# Number of sections iter_sections prepares ahead of its consumer
+SECTION_READ_AHEAD = 64
 
 
 class MergeException(Exception):
@@ -31,9 +56,38 @@ class FileMerger:
         enable_timestamp: bool,
         enable_folder_structure: bool,
         logger: logging.Logger,
+        enable_section_index: bool = False,
+        enable_symbol_index: bool = False,
+        max_output_size_mb: Optional[float] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        budget: Optional[Tuple[int, str]] = None,
+        transforms: Optional[List[str]] = None,
+        enable_checkpoint: bool = False,
+        resume: bool = False,
+        config: Optional[Config] = None,
+        cache: Optional["ProjectCache"] = None,
+        process_pool: Optional[Executor] = None,
     ):
-        """Initialize the FileMerger class."""
-        config = Config(logger=logger)
+        """Initialize the FileMerger class.
+
+        :param enable_symbol_index: Write a sorted index of the top-level
+            symbols defined in each output next to it
+        :param budget: (size, "tokens" or "bytes") to keep only the most
+            relevant files that fit in it
+        :param transforms: Names of the content transforms to apply; read from
+            the configuration if omitted
+        :param enable_checkpoint: Journal finished sections so that an
+            interrupted run can be resumed
+        :param resume: Reuse the sections journaled by an interrupted run
+            (implies enable_checkpoint)
+        :param config: Loaded configuration; read from config.json if omitted
+        :param cache: Warm per-project state to reuse between merges
+        :param process_pool: Worker processes to share with other mergers;
+            by default the merger starts its own when it needs them, and
+            close() shuts them down
+        """
+        if config is None:
+            config = Config(logger=logger)
 
         self.project_path = project_path.resolve()
         self.exclude_types = set(config.exclude_types)
@@ -42,19 +96,82 @@ class FileMerger:
         self.enable_folder_structure = enable_folder_structure
         self.logger = logger
 
+        self.cache = cache
         self.gitignore_parser = GitIgnoreParser(self.project_path)
-        self.file_processor = FileProcessor()
+        self.skip_generated = config.skip_generated
+        self.generated_detector = GeneratedFileDetector(self.project_path)
+        if cache is not None:
+            self.file_processor = cache.file_processor
+        else:
+            self.file_processor = FileProcessor(
+                fallback_encoding=config.fallback_encoding
+            )
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.excluded_folders = set(config.exclude_folders)
+        self.max_workers = config.max_workers
+        if transforms is None:
+            transforms = config.transforms
+        self.transforms = TransformPipeline(transforms)
+        self.redactor = (
+            Redactor(config.redaction_rules) if config.redact_secrets else None
+        )
+        # Spliced sections are copied verbatim, so transforms need the decoding path
+        self.enable_zero_copy = config.zero_copy and not self.transforms
+        self.onefile_renderer = MarkdownRenderer(ONEFILE_TEMPLATE)
+        self.folder_renderer = MarkdownRenderer(FOLDER_TEMPLATE)
 
         self.filtered_files: List[Path] = []
+        self.file_records: List[FileRecord] = []
+        self.generated_files: List[Tuple[Path, str]] = []
 
         self.output_dir = self.project_path / config.output_dir
+        self.output_state = OutputState(self.output_dir)
+        if max_output_size_mb is None:
+            max_output_size_mb = config.max_output_size_mb
+        self.writer = OutputWriter(
+            logger=logger,
+            enable_section_index=enable_section_index,
+            max_part_size=int(max_output_size_mb * 1024 * 1024),
+            state=self.output_state,
+            enable_symbol_index=enable_symbol_index,
+            max_workers=config.max_workers,
+            process_pool=process_pool,
+        )
+        self.remove_stale_outputs = True
+        # Timestamped outputs are never rewritten, so they are not tracked
+        self.output_group = (
+            "onefile" if merge_onefile else None if enable_timestamp else "folders"
+        )
+
+        self.shard = shard
+        self.shard_dir = self.output_dir / "shards"
+        self.shard_writer = OutputWriter(logger=logger, enable_section_index=True)
+        self.budget = budget
+        self.enable_checkpoint = enable_checkpoint or resume
+        self.resume = resume
+        # Everything that changes a rendered section; a checkpoint written
+        # with other values cannot be resumed
+        self.checkpoint_settings = {
+            "transforms": [name for name, _ in self.transforms.transforms],
+            "redact_secrets": config.redact_secrets,
+            "redaction_rules": list(config.redaction_rules),
+            "fallback_encoding": config.fallback_encoding,
+        }
+        self.checkpoint: Optional[Checkpoint] = None
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
     async def initialize(self):
-        """Initialize FileMerger. Initializes GitIgnoreParser."""
-        await self.gitignore_parser.initialize()
+        """Initialize FileMerger. Initializes GitIgnoreParser and GeneratedFileDetector."""
+        if self.cache is not None:
+            self.gitignore_parser = await self.cache.gitignore_parser()
+        else:
+            await self.gitignore_parser.initialize()
+        if self.skip_generated:
+            await self.generated_detector.initialize()
+
+    def close(self):
+        """Shut down the worker processes started by this merger."""
+        self.writer.close()
 
     def _generate_onefile_filename(self) -> Path:
         """Generate the name for the single file."""
@@ -83,106 +200,534 @@ class FileMerger:
 
     async def _filter_files(self):
         """Filter files within the project, excluding specified folders."""
-        self.filtered_files = [
-            file_path
-            for file_path in self.project_path.rglob("*")
-            if await self._should_process_file(file_path)
-        ]
+        self.filtered_files = []
+        self.generated_files = []
+        for file_path in await self._walk():
+            if not await self._should_process_file(file_path):
+                continue
+            reason = self._generated_reason(file_path)
+            if reason is not None:
+                self.generated_files.append((file_path, reason))
+            else:
+                self.filtered_files.append(file_path)
+        self.file_records = []
+        for file_path in self.filtered_files:
+            try:
+                record = FileRecord.from_path(file_path, self.project_path)
+            except OSError as e:
+                # The file was removed or became unreadable after the walk
+                self.logger.error(f"Error reading {file_path}: {str(e)}")
+                continue
+            self.file_records.append(record)
+        if self.skip_generated:
+            self.file_records = await self._sniff_generated(self.file_records)
+        self.filtered_files = [record.source for record in self.file_records]
         self.logger.info(f"Filtered files count: {len(self.filtered_files)}")
+        self._log_generated_files()
+        if self.budget is not None:
+            await self._select_within_budget()
+
+    async def _select_within_budget(self):
+        """Keep only the most relevant files that fit in the budget."""
+        size, unit = self.budget
+        self.file_records = await select_records(
+            self.file_records,
+            budget=size,
+            unit=unit,
+            cache_file=self.output_dir / ".import_graph.json",
+            logger=self.logger,
+            max_workers=self.max_workers,
+        )
+        self.filtered_files = [record.source for record in self.file_records]
+
+    async def _walk(self) -> List[Path]:
+        """List the paths below the project, from the warm cache if there is one."""
+        if self.cache is not None:
+            return await asyncio.to_thread(self.cache.walk, self.excluded_folders)
+        return list(self.project_path.rglob("*"))
 
     async def _should_process_file(self, file_path: Path) -> bool:
         """Check if the given file should be processed."""
-        return (
-            file_path.is_file()
-            and file_path.suffix[1:] not in self.exclude_types
-            and not await self.gitignore_parser.is_ignored(file_path)
-            and not self._is_excluded_folder(file_path)
-        )
+        return file_path.is_file() and not await self._exclusion_reason(file_path)
+
+    async def _exclusion_reason(self, file_path: Path) -> Optional[str]:
+        """Return the rule that excludes the given file, or None if it is included."""
+        extension = file_path.suffix[1:]
+        if extension in self.exclude_types:
+            return f"exclude_types: {extension}"
+        pattern = await self.gitignore_parser.matching_pattern(file_path)
+        if pattern is not None:
+            return f".gitignore: {pattern}"
+        folder = self._excluded_folder(file_path)
+        if folder is not None:
+            return f"exclude_folders: {folder}"
+        return None
+
+    def _generated_reason(self, file_path: Path) -> Optional[str]:
+        """Return why the file is considered generated by its path, or None."""
+        if not self.skip_generated:
+            return None
+        return self.generated_detector.match_name(file_path)
 
-    def _is_excluded_folder(self, path: Path) -> bool:
-        """Check if the given path is in an excluded folder."""
-        return any(excluded in path.parts for excluded in self.excluded_folders)
+    async def _sniff_generated(self, records: List[FileRecord]) -> List[FileRecord]:
+        """Drop records whose leading bytes look minified or generated."""
+        candidates = [record for record in records if record.size >= MIN_SNIFF_SIZE]
+        reasons = await asyncio.gather(
+            *(self._sniff_record(record) for record in candidates)
+        )
+        generated = {
+            id(record): reason
+            for record, reason in zip(candidates, reasons)
+            if reason is not None
+        }
+        if not generated:
+            return records
+        kept = []
+        for record in records:
+            reason = generated.get(id(record))
+            if reason is None:
+                kept.append(record)
+            else:
+                self.generated_files.append((record.source, reason))
+        return kept
 
-    async def _process_files(self) -> List[Tuple[Path, str, str]]:
-        """Process all filtered files."""
-        tasks = [
-            self._process_file_wrapper(file_path) for file_path in self.filtered_files
-        ]
-        processed_files = [result for result in await asyncio.gather(*tasks) if result]
-        self.logger.info(f"Processed: {len(processed_files)} files")
-        return processed_files
-
-    async def _process_file_wrapper(
-        self, file_path: Path
-    ) -> Optional[Tuple[Path, str, str]]:
-        """A wrapper function for processing individual files."""
+    async def _sniff_record(self, record: FileRecord) -> Optional[str]:
         try:
-            result = await self.file_processor.process_file(
-                file_path, self.project_path
+            return await self.file_processor.run_io(
+                self.generated_detector.sniff, record.source
             )
-            self.logger.debug(
-                f"Processed: {file_path}, content length: {len(result[2]) if result else 0}"
-            )
-            return result
-        except Exception as e:
-            self.logger.error(f"Error processing file {file_path}: {str(e)}")
+        except OSError as e:
+            self.logger.error(f"Error reading {record.source}: {str(e)}")
             return None
 
-    async def _categorize_files(
-        self, processed_files: List[Tuple[Path, str, str]]
-    ) -> Dict[Path, List[Tuple[Path, str, str]]]:
-        """Categorize processed files by folder asynchronously."""
-        categorized = {}
-
-        async def categorize_file(file_path: Path, extension: str, content: str):
-            folder = file_path.parent
-            if folder not in categorized:
-                categorized[folder] = []
-            categorized[folder].append((file_path, extension, content))
-
-        await asyncio.gather(
-            *(
-                categorize_file(file_path, extension, content)
-                for file_path, extension, content in processed_files
-            )
+    def _log_generated_files(self):
+        """Report the generated files skipped by the last filtering pass."""
+        if not self.generated_files:
+            return
+        for file_path, reason in self.generated_files:
+            self.logger.debug(f"Skipped {file_path} ({reason})")
+        counts = Counter(reason for _, reason in self.generated_files)
+        summary = ", ".join(f"{reason} x{count}" for reason, count in counts.items())
+        self.logger.info(
+            f"Skipped {len(self.generated_files)} generated files: {summary}"
+        )
+
+    def _log_run_summary(self):
+        """Report what redaction and transforms changed in the last run."""
+        if self.redactor and self.redactor.findings:
+            for finding in self.redactor.findings:
+                self.logger.warning(
+                    f"Redacted {finding.rule} in {finding.path.as_posix()}:{finding.line}"
+                )
+            self.logger.info(self.redactor.format_findings())
+        if self.transforms:
+            self.logger.info(self.transforms.format_savings())
+
+    def _excluded_folder(self, path: Path) -> Optional[str]:
+        """Return the excluded folder name the given path is in, if any."""
+        return next(
+            (excluded for excluded in path.parts if excluded in self.excluded_folders),
+            None,
         )
 
+    async def estimate(
+        self, top_n: int = 10, sniff_generated: bool = False
+    ) -> EstimateReport:
+        """
+        Estimate what a run would produce by only enumerating and stat'ing files.
+
+        Generated files are recognized by name and ``.gitattributes`` only,
+        unless sniffing is requested.
+
+        :param top_n: Number of largest files to report
+        :param sniff_generated: Also read the prefix of every file to find
+            generated files by content, as a run does
+        :return: Report of the files that would be included and excluded
+        """
+        await self.initialize()
+        report = EstimateReport(top_n=top_n)
+        if self.skip_generated and not sniff_generated:
+            report.notes.append(
+                "Generated files only recognizable by their content are counted "
+                "as included; use --estimate-sniff to read file prefixes"
+            )
+        records = []
+        for file_path in await self._walk():
+            try:
+                if not file_path.is_file():
+                    continue
+                reason = await self._exclusion_reason(
+                    file_path
+                ) or self._generated_reason(file_path)
+                if reason is None:
+                    records.append(FileRecord.from_path(file_path, self.project_path))
+                else:
+                    report.add_excluded(reason, file_path.stat().st_size)
+            except OSError as e:
+                # The file was removed or became unreadable during the walk
+                self.logger.error(f"Error reading {file_path}: {str(e)}")
+        if self.skip_generated and sniff_generated:
+            self.generated_files = []
+            kept = await self._sniff_generated(records)
+            sizes = {record.source: record.size for record in records}
+            for file_path, reason in self.generated_files:
+                report.add_excluded(reason, sizes[file_path])
+            records = kept
+        for record in records:
+            report.add_file(record)
+        return report
+
+    async def _load_records(self, records: List[FileRecord]) -> List[FileRecord]:
+        """
+        Load the content of the given records, dropping unreadable files.
+
+        Errors other than unreadable files propagate, so that the caller keeps
+        the previous output instead of writing (or deleting) it as empty.
+        """
+        loaded = await self.file_processor.load_many(records)
+        if self.redactor or self.transforms:
+            await asyncio.to_thread(self._process_contents, loaded)
+        for record in loaded:
+            self.logger.debug(
+                f"Processed: {record.source}, content length: {len(record.content)}"
+            )
+        return loaded
+
+    def _process_contents(self, records: List[FileRecord]):
+        """Redact secrets, then apply the content transforms, in place."""
+        for record in records:
+            if self.redactor:
+                record.content = self.redactor.redact(record.content, record.path)
+            if self.transforms:
+                record.content = self.transforms.apply(record.content, record.extension)
+
+    def _group_by_folder(
+        self, records: List[FileRecord]
+    ) -> Dict[Path, List[FileRecord]]:
+        """Group records by the folder they belong to."""
+        categorized: Dict[Path, List[FileRecord]] = {}
+        for record in records:
+            categorized.setdefault(record.folder, []).append(record)
         return categorized
 
-    async def _write_multiple_files(
-        self, categorized_files: Dict[Path, List[Tuple[Path, str, str]]]
-    ) -> List[Path]:
-        """Write content to multiple files based on folder structure."""
+    async def _write_multiple_files(self, records: List[FileRecord]) -> List[Path]:
+        """Write content to multiple files based on folder structure.
+
+        Folders are processed one at a time and their contents released once
+        written, so peak memory scales with the largest folder.
+        """
         output_files = []
-        for folder_path, files in categorized_files.items():
+        processed_count = 0
+        for folder_path, files in self._group_by_folder(records).items():
             try:
+                resumed, pending = self._resume_sections(files)
+                loaded = await self._load_records(pending)
+                processed_count += len(loaded) + len(resumed)
+                if not loaded and not resumed:
+                    continue
                 output_file = self._generate_output_path(folder_path)
 
-                content = await generate_content(folder_path, files)
-                async with aiofiles.open(
-                    output_file, "w", encoding="utf-8"
-                ) as out_file:
-                    await out_file.write(content)
-                output_files.append(output_file)
+                header, sections = await generate_content_sections(folder_path, loaded)
+                await self._journal_sections(loaded, sections)
+                if resumed:
+                    sections = sorted(sections + resumed, key=lambda s: s[0])
+                output_files.extend(
+                    await self.writer.write(
+                        output_file, header, sections, self.output_group
+                    )
+                )
                 self.logger.info(f"Created file: {output_file}")
             except Exception as e:
                 self.logger.error(f"Error processing folder {folder_path}: {str(e)}")
+                # Keep the previous output of a folder that failed this time
+                self.remove_stale_outputs = False
+            finally:
+                for record in files:
+                    record.release()
+        self.logger.info(f"Processed: {processed_count} files")
         return output_files
 
-    async def _write_onefile(self, processed_files) -> Path:
+    def _scan_batch(
+        self, records: List[FileRecord]
+    ) -> List[Tuple[FileRecord, Optional[SplicedSection]]]:
+        """
+        Scan a batch of files for splicing in a single executor task.
+
+        Blocking; run it in a worker thread.
+
+        :return: (record, section) pairs, with None for files that have to be
+            decoded; files that could not be read are left out
+        """
+        scanned = []
+        for record in records:
+            prefix, suffix = self.onefile_renderer.frame(record.path, record.extension)
+            try:
+                section = scan_file(
+                    record.source,
+                    prefix.encode("utf-8"),
+                    suffix.encode("utf-8"),
+                    self.redactor,
+                )
+            except Exception as e:
+                self.logger.error(f"Error processing file {record.source}: {str(e)}")
+                continue
+            scanned.append((record, section))
+        return scanned
+
+    async def _splice_batch(
+        self, records: List[FileRecord]
+    ) -> List[Tuple[Path, Union[str, SplicedSection]]]:
+        """Prepare the sections of a batch of files, decoding only where necessary."""
+        scanned = await self.file_processor.run_io(self._scan_batch, records)
+        sections: List[Tuple[Path, Union[str, SplicedSection]]] = [
+            (record.path, section) for record, section in scanned if section
+        ]
+        # Secrets to redact, invalid UTF-8, Unicode whitespace at the edges or
+        # code fences in the content: take the regular path
+        loaded = await self._load_records(
+            [record for record, section in scanned if section is None]
+        )
+        _, decoded = await generate_onefile_sections(Path("."), loaded)
+        for record in loaded:
+            record.release()
+        sections.extend(decoded)
+        await self._journal_sections(records, sections)
+        return sections
+
+    def _resume_sections(
+        self, records: List[FileRecord]
+    ) -> Tuple[List[Tuple[Path, Union[str, SplicedSection]]], List[FileRecord]]:
+        """Split records into sections taken from the checkpoint and files to read."""
+        if self.checkpoint is None:
+            return [], records
+        resumed, pending = [], []
+        for record in records:
+            section = self.checkpoint.lookup(record)
+            if section is not None:
+                resumed.append((record.path, section))
+            else:
+                pending.append(record)
+        return resumed, pending
+
+    async def _journal_sections(
+        self,
+        records: List[FileRecord],
+        sections: List[Tuple[Path, Union[str, SplicedSection]]],
+    ):
+        """Record the rendered sections of the given records in the checkpoint."""
+        if self.checkpoint is None:
+            return
+        by_path = {record.path: record for record in records}
+        for path, section in sections:
+            self.checkpoint.add(by_path[path], section)
+        await self.checkpoint.maybe_flush()
+
+    async def _open_checkpoint(self):
+        """Start the checkpoint journal, or pick up the one of an interrupted run."""
+        if not self.enable_checkpoint:
+            return
+        if self.shard:
+            name = ShardManifest.stem(self.project_path.name, *self.shard)
+        else:
+            name = self.project_path.name
+        self.checkpoint = Checkpoint(
+            self.output_dir / CHECKPOINT_DIR / name,
+            self.checkpoint_settings,
+            self.logger,
+        )
+        await self.checkpoint.open(self.resume)
+
+    async def _complete_checkpoint(self):
+        """Drop the checkpoint journal of a run in which every folder succeeded."""
+        if self.checkpoint is None:
+            return
+        if self.checkpoint.resumed:
+            self.logger.info(
+                f"Resumed {self.checkpoint.resumed} files from the checkpoint"
+            )
+        if not self.remove_stale_outputs:
+            # Keep the finished sections for a --resume after the failed folders
+            self.logger.info("Some folders failed, keeping the checkpoint")
+            return
+        await self.checkpoint.remove()
+
+    async def _onefile_sections(
+        self, records: List[FileRecord]
+    ) -> List[Tuple[Path, Union[str, SplicedSection]]]:
+        """Render the sections of the single file, ordered by file path."""
+        if self.enable_zero_copy:
+            sections, pending = self._resume_sections(records)
+            # Small files are scanned in batches, one executor task per batch
+            small = [record for record in pending if record.size <= SMALL_FILE_SIZE]
+            batches = [
+                small[i : i + SMALL_FILE_BATCH_SIZE]
+                for i in range(0, len(small), SMALL_FILE_BATCH_SIZE)
+            ]
+            batches += [[record] for record in pending if record.size > SMALL_FILE_SIZE]
+            for batch in await asyncio.gather(
+                *(self._splice_batch(batch) for batch in batches)
+            ):
+                sections.extend(batch)
+            sections.sort(key=lambda section: section[0])
+        else:
+            sections, pending = self._resume_sections(records)
+            # With a checkpoint, files are decoded in batches so that finished
+            # sections are journaled while the run goes on
+            batch_size = (
+                CHECKPOINT_BATCH_SIZE if self.checkpoint else max(len(pending), 1)
+            )
+            for i in range(0, len(pending), batch_size):
+                loaded = await self._load_records(pending[i : i + batch_size])
+                _, batch = await generate_onefile_sections(Path("."), loaded)
+                await self._journal_sections(loaded, batch)
+                for record in loaded:
+                    record.release()
+                sections.extend(batch)
+            sections.sort(key=lambda section: section[0])
+        self.logger.info(f"Processed: {len(sections)} files")
+        return sections
+
+    async def _write_onefile(self, records: List[FileRecord]) -> List[Path]:
         """Write the content to a single file."""
         output_file = self._generate_onefile_filename()
 
-        folder_path = Path(".")
-        content = await generate_onefile_content(folder_path, processed_files)
-        # content = await generate_onefile_content(processed_files)
-
-        async with aiofiles.open(output_file, "w", encoding="utf-8") as out_file:
-            await out_file.write(content)
+        sections = await self._onefile_sections(records)
+        output_files = await self.writer.write(
+            output_file,
+            self.onefile_renderer.header(Path(".")),
+            sections,
+            self.output_group,
+        )
         self.logger.info(f"Created single file: {output_file}")
-        return output_file
+        return output_files
+
+    async def _write_shard(self) -> List[Path]:
+        """Write this shard's partial output, structure file and manifest."""
+        number, count = self.shard
+        records = [
+            record
+            for record in self.file_records
+            if shard_of(record.path, count) == number
+        ]
+        self.logger.info(f"Shard {number}/{count}: {len(records)} files")
+        stem = ShardManifest.stem(self.project_path.name, number, count)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+
+        # Sections are the same in both layouts, so merge-shards can build either
+        document = self.shard_dir / f"{stem}.md"
+        output_files = await self.shard_writer.write(
+            document,
+            f"# {self.project_path.name} shard {number}/{count}",
+            await self._onefile_sections(records),
+        )
+
+        # Every shard sees the full filtered file list; the first one writes the tree
+        structure = None
+        if number == 1:
+            structure = await self._generate_tree_structure(
+                self.shard_dir / f"{stem}_structure.md"
+            )
+            if structure:
+                output_files.append(structure)
+
+        manifest = ShardManifest(
+            project=self.project_path.name,
+            number=number,
+            count=count,
+            document=document.name,
+            structure=structure.name if structure else None,
+        )
+        output_files.append(await manifest.write(self.shard_dir))
+        return output_files
+
+    async def merge_shards(self) -> List[Path]:
+        """
+        Combine the partial outputs of all shards into the regular outputs.
+
+        Sections are spliced out of the partial documents using their section
+        indexes, so the result is byte-identical to a single-node run.
+
+        :return: Paths of generated output files
+        """
+        try:
+            await self.output_state.load()
+            manifests = await ShardManifest.load_all(
+                self.shard_dir, self.project_path.name
+            )
+            sections: List[Tuple[Path, SplicedSection]] = []
+            structure = None
+            for manifest in manifests:
+                document = self.shard_dir / manifest.document
+                index = await SectionIndex.load(document)
+                for path, offset, length, line_start, line_end, digest in index.entries:
+                    sections.append(
+                        (
+                            Path(path),
+                            SplicedSection(
+                                source=document,
+                                prefix=b"",
+                                start=offset,
+                                end=offset + length,
+                                suffix=b"",
+                                newlines=line_end - line_start + 1,
+                                digest=digest,
+                            ),
+                        )
+                    )
+                if manifest.structure:
+                    structure = self.shard_dir / manifest.structure
+            sections.sort(key=lambda section: section[0])
+            self.logger.info(
+                f"Merging {len(sections)} files from {len(manifests)} shards"
+            )
+
+            output_files = []
+            if self.onefile:
+                output_file = self._generate_onefile_filename()
+                output_files.extend(
+                    await self.writer.write(
+                        output_file,
+                        self.onefile_renderer.header(Path(".")),
+                        sections,
+                        self.output_group,
+                    )
+                )
+                self.logger.info(f"Created single file: {output_file}")
+            else:
+                folders: Dict[Path, List[Tuple[Path, SplicedSection]]] = {}
+                for section in sections:
+                    folders.setdefault(section[0].parent, []).append(section)
+                for folder_path, folder_sections in folders.items():
+                    output_file = self._generate_output_path(folder_path)
+                    output_files.extend(
+                        await self.writer.write(
+                            output_file,
+                            self.folder_renderer.header(folder_path),
+                            folder_sections,
+                            self.output_group,
+                        )
+                    )
+                    self.logger.info(f"Created file: {output_file}")
+
+            if self.enable_folder_structure and structure is not None:
+                tree_output_file = self._generate_tree_structure_filename()
+                async with aiofiles.open(structure, "rb") as f:
+                    await self.writer.write_chunks(
+                        tree_output_file, [await f.read()], "structure"
+                    )
+                self.logger.info(f"Created structure file: {tree_output_file}")
+                output_files.append(tree_output_file)
+
+            await self._finish_outputs()
+            return output_files
 
-    async def _generate_tree_structure(self) -> Optional[Path]:
+        except Exception as e:
+            self.logger.error(f"Unexpected error while merging shards: {str(e)}")
+            raise MergeException(str(e))
+
+    async def _generate_tree_structure(
+        self, tree_output_file: Optional[Path] = None
+    ) -> Optional[Path]:
         """Generate and write the tree structure file if enabled."""
         if not self.enable_folder_structure:
             return None
@@ -191,17 +736,88 @@ class FileMerger:
             tree_structure = await generate_tree_structure(
                 files=self.filtered_files, project_path=self.project_path
             )
-            tree_output_file = self._generate_tree_structure_filename()
-            async with aiofiles.open(
-                tree_output_file, "w", encoding="utf-8"
-            ) as tree_file:
-                await tree_file.write(tree_structure)
+            writer = self.writer
+            if tree_output_file is None:
+                tree_output_file = self._generate_tree_structure_filename()
+            else:
+                writer = self.shard_writer
+            await writer.write_chunks(
+                tree_output_file, [tree_structure.encode("utf-8")], "structure"
+            )
             self.logger.info(f"Created structure file: {tree_output_file}")
             return tree_output_file
         except Exception as e:
             self.logger.error(f"Error generating structure: {str(e)}")
             return None
 
+    async def _finish_outputs(self):
+        """Remove the stale outputs of previous runs and save the output state."""
+        if self.output_group is not None and self.remove_stale_outputs:
+            for stale_file in self.output_state.stale(self.output_group):
+                stale_file.unlink(missing_ok=True)
+                self.output_state.forget(stale_file)
+                self.logger.info(f"Removed stale output: {stale_file}")
+        await self.output_state.save()
+        self.logger.info(
+            f"Wrote {self.writer.written} files, " f"{self.writer.unchanged} unchanged"
+        )
+
+    async def iter_sections(
+        self, read_ahead: int = SECTION_READ_AHEAD
+    ) -> AsyncIterator[RenderedSection]:
+        """
+        Yield the rendered sections of all files, ordered by path, without
+        writing any output files.
+
+        Files are read at most ``read_ahead`` sections ahead of the consumer,
+        so a slow consumer holds back reading instead of letting rendered
+        sections pile up in memory::
+
+            async for section in merger.iter_sections():
+                handle(section.path, section.markdown)
+
+        :param read_ahead: Maximum number of sections prepared ahead of the consumer
+        :return: Async iterator of rendered sections
+        """
+        try:
+            await self.initialize()
+            await self._filter_files()
+        except Exception as e:
+            self.logger.error(f"Unexpected error during rendering: {str(e)}")
+            raise MergeException(str(e))
+
+        records = sorted(self.file_records, key=lambda record: record.path)
+        queue: "asyncio.Queue[Optional[RenderedSection]]" = asyncio.Queue(read_ahead)
+
+        async def produce():
+            try:
+                for i in range(0, len(records), read_ahead):
+                    batch = records[i : i + read_ahead]
+                    for record in await self._load_records(batch):
+                        section = RenderedSection(
+                            path=record.path,
+                            language=record.extension,
+                            content=record.content,
+                            markdown=self.onefile_renderer.render_section(
+                                record.path, record.extension, record.content
+                            ),
+                        )
+                        record.release()
+                        await queue.put(section)
+            except Exception:
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (section := await queue.get()) is not None:
+                yield section
+            await producer
+            self._log_run_summary()
+        finally:
+            producer.cancel()
+
     async def merge_files(self) -> List[Path]:
         """
         Main function for merging files.
@@ -212,23 +828,35 @@ class FileMerger:
         try:
             await self.initialize()
             await self._filter_files()
-            processed_files = await self._process_files()
+            await self._open_checkpoint()
+            if self.shard:
+                output_files = await self._write_shard()
+                await self._complete_checkpoint()
+                self._log_run_summary()
+                return output_files
+
+            await self.output_state.load()
 
             output_files = []
 
             if self.onefile:
-                output_file = await self._write_onefile(processed_files)
-                output_files.append(output_file)
+                output_files.extend(await self._write_onefile(self.file_records))
             else:
-                categorized_files = await self._categorize_files(processed_files)
-                output_files.extend(await self._write_multiple_files(categorized_files))
+                output_files.extend(await self._write_multiple_files(self.file_records))
 
             tree_structure_file = await self._generate_tree_structure()
             if tree_structure_file:
                 output_files.append(tree_structure_file)
 
+            await self._finish_outputs()
+            await self._complete_checkpoint()
+            self._log_run_summary()
             return output_files
 
         except Exception as e:
             self.logger.error(f"Unexpected error during file merging: {str(e)}")
             raise MergeException(str(e))
+        finally:
+            # Keep what an interrupted run finished for --resume
+            if self.checkpoint is not None:
+                await self.checkpoint.flush()
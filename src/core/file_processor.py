@@ -1,32 +1,143 @@
+import asyncio
 import logging
+import os
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Callable, List, Optional, TypeVar
 
-import aiofiles
+from src.utils.encoding import decode_bytes
+
+from .file_record import FileRecord
+
+if TYPE_CHECKING:
+    from .project_cache import ContentCache
+
+T = TypeVar("T")
+
+# Files up to this size are read in batches by a single executor task
+SMALL_FILE_SIZE = 16 * 1024
+SMALL_FILE_BATCH_SIZE = 64
 
 
 class FileProcessor:
+    def __init__(
+        self,
+        fallback_encoding: Optional[str] = None,
+        content_cache: Optional["ContentCache"] = None,
+        io_limit: Optional[asyncio.Semaphore] = None,
+    ):
+        """
+        :param fallback_encoding: Encoding for files that are not UTF-8/16/32
+        :param content_cache: Cache of decoded contents, validated by mtime and size
+        :param io_limit: Semaphore bounding concurrent executor reads, shared
+            between processors
+        """
+        self.fallback_encoding = fallback_encoding
+        self.content_cache = content_cache
+        self.io_limit = io_limit
+
+    async def run_io(self, func: Callable[..., T], *args) -> T:
+        """Run a blocking I/O function in the executor, within the I/O limit."""
+        if self.io_limit is None:
+            return await asyncio.to_thread(func, *args)
+        async with self.io_limit:
+            return await asyncio.to_thread(func, *args)
+
     @staticmethod
     def get_file_extension(filename: Path) -> str:
         return filename.suffix[1:]
 
     @staticmethod
-    async def read_file_content(file_path: Path) -> Optional[str]:
+    def read_file_bytes(file_path: Path, size: Optional[int] = None) -> bytearray:
+        """Read a whole file with a single readinto into a preallocated buffer.
+
+        :param file_path: Path of the file
+        :param size: Expected size from an earlier stat, if known
+        """
+        with open(file_path, "rb", buffering=0) as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            buffer = bytearray(size)
+            with memoryview(buffer) as view:
+                length = 0
+                while length < size:
+                    read = f.readinto(view[length:])
+                    if not read:
+                        break
+                    length += read
+            if length < size:
+                del buffer[length:]
+            else:
+                # The file may have grown since it was stat'ed
+                buffer += f.readall()
+        return buffer
+
+    def _read_and_decode(self, file_path: Path, size: Optional[int]) -> Optional[str]:
+        decoded = decode_bytes(
+            self.read_file_bytes(file_path, size), self.fallback_encoding
+        )
+        if decoded is None:
+            logging.warning(f"Unable to decode {file_path} as text. Skipping.")
+            return None
+        content, encoding = decoded
+        if encoding != "utf-8":
+            logging.debug(f"Decoded {file_path} as {encoding}")
+        return content
+
+    def _read_content(self, file_path: Path, size: Optional[int]) -> Optional[str]:
         try:
-            async with aiofiles.open(file_path, "r") as f:
-                return await f.read()
-        except UnicodeDecodeError:
-            logging.warning(f"Unable to read {file_path} as UTF-8. Skipping.")
+            return self._read_and_decode(file_path, size)
         except PermissionError:
             logging.error(f"Permission denied: Unable to read {file_path}")
         except Exception as e:
             logging.error(f"Unexpected error reading {file_path}: {str(e)}")
         return None
 
-    async def process_file(
-        self, file_path: Path, project_path: Path
-    ) -> Tuple[Path, str, Optional[str]]:
-        relative_path = file_path.relative_to(project_path)
-        extension = self.get_file_extension(file_path)
-        content = await self.read_file_content(file_path)
-        return relative_path, extension, content
+    def _load_batch(self, records: List[FileRecord]):
+        for record in records:
+            record.content = self._read_content(record.source, record.size)
+            self._cache_put(record)
+
+    def _cache_put(self, record: FileRecord):
+        if self.content_cache is not None and record.content is not None:
+            self.content_cache.put(record)
+
+    async def read_file_content(
+        self, file_path: Path, size: Optional[int] = None
+    ) -> Optional[str]:
+        return await self.run_io(self._read_content, file_path, size)
+
+    async def load(self, record: FileRecord) -> FileRecord:
+        if self.content_cache is not None and self.content_cache.get(record):
+            return record
+        record.content = await self.read_file_content(record.source, record.size)
+        self._cache_put(record)
+        return record
+
+    async def load_many(self, records: List[FileRecord]) -> List[FileRecord]:
+        """Load the content of many records.
+
+        Small files are grouped so that one executor task reads a whole batch,
+        instead of paying a thread dispatch per file; large files keep their
+        own task.
+
+        :param records: Records to load
+        :return: The records whose content could be read
+        """
+        pending = records
+        if self.content_cache is not None:
+            pending = [
+                record for record in records if not self.content_cache.get(record)
+            ]
+        small = [record for record in pending if record.size <= SMALL_FILE_SIZE]
+        large = [record for record in pending if record.size > SMALL_FILE_SIZE]
+        await asyncio.gather(
+            *(
+                self.run_io(self._load_batch, small[i : i + SMALL_FILE_BATCH_SIZE])
+                for i in range(0, len(small), SMALL_FILE_BATCH_SIZE)
+            ),
+            *(self.load(record) for record in large),
+        )
+        return [record for record in records if record.content is not None]
+
+    async def process_file(self, file_path: Path, project_path: Path) -> FileRecord:
+        return await self.load(FileRecord.from_path(file_path, project_path))
@@ -0,0 +1,72 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+
+class FileRecord:
+    """
+    A compact description of a project file.
+
+    Metadata comes from a single ``stat`` call; the content is only attached
+    while the file is being rendered and can be released afterwards.
+    """
+
+    __slots__ = ("path", "source", "extension", "size", "mtime", "content", "_digest")
+
+    def __init__(
+        self,
+        path: Path,
+        source: Path,
+        extension: str,
+        size: int,
+        mtime: float,
+        content: Optional[str] = None,
+    ):
+        """
+        Initialize the FileRecord class.
+
+        :param path: Path of the file relative to the project
+        :param source: Absolute path of the file on disk
+        :param extension: File extension without the leading dot
+        :param size: File size in bytes
+        :param mtime: Last modification time
+        :param content: File content, if already loaded
+        """
+        self.path = path
+        self.source = source
+        self.extension = extension
+        self.size = size
+        self.mtime = mtime
+        self.content = content
+        self._digest: Optional[str] = None
+
+    @classmethod
+    def from_path(cls, file_path: Path, project_path: Path) -> "FileRecord":
+        """Create a record for the given file without reading its content."""
+        stat = file_path.stat()
+        return cls(
+            path=file_path.relative_to(project_path),
+            source=file_path,
+            extension=file_path.suffix[1:],
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+        )
+
+    @property
+    def folder(self) -> Path:
+        """Folder of the file relative to the project."""
+        return self.path.parent
+
+    @property
+    def digest(self) -> Optional[str]:
+        """SHA-1 of the content, computed on first access while it is loaded."""
+        if self._digest is None and self.content is not None:
+            self._digest = hashlib.sha1(self.content.encode("utf-8")).hexdigest()
+        return self._digest
+
+    def release(self):
+        """Drop the loaded content, keeping the metadata."""
+        self.content = None
+
+    def __repr__(self) -> str:
+        return f"FileRecord({str(self.path)!r}, size={self.size})"
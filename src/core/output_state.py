@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import aiofiles
+
+from .splice import SplicedSection, write_spliced
+
+STATE_VERSION = 1
+STATE_FILE = ".outputs.json"
+COMPARE_CHUNK_SIZE = 1024 * 1024
+
+Chunk = Union[bytes, SplicedSection]
+
+
+def fingerprint(chunks: Sequence[Chunk]) -> str:
+    """
+    Hash a document made of encoded chunks and spliced sections.
+
+    Spliced sections contribute the hash computed while they were scanned,
+    so their bodies are not read again.
+    """
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        if isinstance(chunk, SplicedSection):
+            digest.update(b"\0spliced:" + chunk.digest.encode("ascii"))
+        else:
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _same_content(output_file: Path, chunks: Sequence[Chunk]) -> bool:
+    """Compare an existing file with the chunks, stopping at the first difference."""
+    with open(output_file, "rb") as existing:
+        for chunk in chunks:
+            if not isinstance(chunk, SplicedSection):
+                if existing.read(len(chunk)) != chunk:
+                    return False
+                continue
+            if existing.read(len(chunk.prefix)) != chunk.prefix:
+                return False
+            with open(chunk.source, "rb") as src_file:
+                src_file.seek(chunk.start)
+                remaining = chunk.end - chunk.start
+                while remaining:
+                    block = src_file.read(min(COMPARE_CHUNK_SIZE, remaining))
+                    if not block or existing.read(len(block)) != block:
+                        return False
+                    remaining -= len(block)
+            if existing.read(len(chunk.suffix)) != chunk.suffix:
+                return False
+        return not existing.read(1)
+
+
+def write_atomic(output_file: Path, chunks: Sequence[Chunk]) -> bool:
+    """
+    Replace a file with the given chunks unless it already holds them.
+
+    The document is written to a temporary file next to the target and moved
+    into place with ``os.replace``, so readers never see a partial file.
+    Blocking; run it in a worker thread.
+
+    :param output_file: Path of the output document
+    :param chunks: Encoded chunks and spliced sections in write order
+    :return: Whether the file was written
+    """
+    try:
+        size = output_file.stat().st_size
+    except FileNotFoundError:
+        size = None
+    if size == sum(len(chunk) for chunk in chunks) and _same_content(
+        output_file, chunks
+    ):
+        return False
+
+    temp_file = output_file.with_name(f".{output_file.name}.{secrets.token_hex(4)}.tmp")
+    try:
+        write_spliced(temp_file, chunks)
+        os.replace(temp_file, output_file)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
+    return True
+
+
+class OutputState:
+    """
+    The outputs written by previous runs, kept in the output folder.
+
+    Each output is recorded with its size, modification time and content
+    fingerprint. An output whose file still matches its record and whose new
+    content has the same fingerprint is current and is not read or rewritten.
+    Outputs belong to a group (per-folder documents, the single file); a
+    recorded output of a group that a run did not produce again is stale.
+    """
+
+    def __init__(self, output_dir: Path):
+        """
+        Initialize the OutputState class.
+
+        :param output_dir: Folder the outputs are written to
+        """
+        self.output_dir = output_dir
+        self.path = output_dir / STATE_FILE
+        # name -> [size, mtime_ns, fingerprint, group]
+        self.entries: Dict[str, list] = {}
+        self.produced: Dict[str, str] = {}
+
+    async def load(self):
+        """Load the state of the previous run, if any."""
+        self.produced = {}
+        try:
+            async with aiofiles.open(self.path, "r", encoding="utf-8") as f:
+                data = json.loads(await f.read())
+            if data.get("version") == STATE_VERSION:
+                self.entries = data["files"]
+        except (OSError, ValueError, KeyError):
+            # No previous run, or an unreadable state: treat every output as new
+            self.entries = {}
+
+    async def save(self):
+        """Write the state for the next run."""
+        data = {"version": STATE_VERSION, "files": self.entries}
+        encoded = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        await asyncio.to_thread(write_atomic, self.path, [encoded])
+
+    def is_current(self, output_file: Path, digest: str) -> bool:
+        """Whether the output on disk is the one recorded with this fingerprint."""
+        entry = self.entries.get(output_file.name)
+        if entry is None or entry[2] != digest:
+            return False
+        try:
+            stat = output_file.stat()
+        except OSError:
+            return False
+        return [stat.st_size, stat.st_mtime_ns] == entry[:2]
+
+    def record(self, output_file: Path, digest: str, group: Optional[str]):
+        """
+        Record an output produced by this run.
+
+        :param output_file: Path of the output
+        :param digest: Fingerprint of its content
+        :param group: Group the output belongs to, or None to leave it untracked
+        """
+        if group is None or output_file.parent != self.output_dir:
+            return
+        stat = output_file.stat()
+        self.entries[output_file.name] = [
+            stat.st_size,
+            stat.st_mtime_ns,
+            digest,
+            group,
+        ]
+        self.produced[output_file.name] = group
+
+    def stale(self, group: str) -> List[Path]:
+        """Return the outputs of a group recorded before but not produced this run."""
+        return [
+            self.output_dir / name
+            for name, entry in self.entries.items()
+            if entry[3] == group and name not in self.produced
+        ]
+
+    def forget(self, output_file: Path):
+        """Drop a removed output from the state."""
+        self.entries.pop(output_file.name, None)
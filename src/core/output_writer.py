@@ -0,0 +1,294 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .output_state import OutputState, fingerprint, write_atomic
+from .section_index import SectionIndex
+from .splice import SplicedSection
+from .symbol_index import SectionSymbol, SymbolIndex, extract_section_symbols
+
+MANIFEST_VERSION = 1
+
+EncodedSection = Tuple[Path, Union[bytes, SplicedSection]]
+
+
+def encode_document(
+    header: str,
+    sections: Iterable[EncodedSection],
+    index: Optional[SectionIndex] = None,
+) -> List[Union[bytes, SplicedSection]]:
+    """
+    Encode a document into byte chunks, recording section offsets as it goes.
+
+    The chunks join to the same bytes as ``"\\n".join([header, *sections])``.
+
+    :param header: Document header line
+    :param sections: Iterable of (relative file path, encoded section content
+        or spliced section)
+    :param index: Optional index to record section offsets into
+    :return: List of encoded chunks in write order
+    """
+    chunks = [header.encode("utf-8")]
+    offset = len(chunks[0])
+    line = 1 + chunks[0].count(b"\n")
+    for file_path, data in sections:
+        chunks.append(b"\n")
+        offset += 1
+        line += 1
+        if isinstance(data, SplicedSection):
+            if index is not None:
+                index.record(
+                    file_path,
+                    offset,
+                    len(data),
+                    line,
+                    line + data.newlines - 1,
+                    data.digest,
+                )
+            line += data.newlines
+        elif index is not None:
+            line += index.add(file_path, offset, data, line)
+        chunks.append(data)
+        offset += len(data)
+    return chunks
+
+
+class OutputWriter:
+    """
+    A class for writing generated markdown documents to disk.
+
+    Every file is written to a temporary file and moved into place, and files
+    whose content did not change are left untouched.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        enable_section_index: bool = False,
+        max_part_size: int = 0,
+        state: Optional[OutputState] = None,
+        enable_symbol_index: bool = False,
+        max_workers: Optional[int] = None,
+        process_pool: Optional[Executor] = None,
+    ):
+        """
+        Initialize the OutputWriter class.
+
+        :param logger: Logger object
+        :param enable_section_index: Write a byte-offset index next to each output
+        :param max_part_size: Roll over to a new part file once a document
+            exceeds this many bytes (0 disables rolling)
+        :param state: Outputs of the previous run, to skip unchanged files
+            without reading them back and to record this run's outputs
+        :param enable_symbol_index: Write an index of the symbols defined in
+            each output next to it
+        :param max_workers: Maximum number of processes extracting symbols
+        :param process_pool: Worker processes extracting symbols, shared with
+            other writers; by default the writer starts its own pool on first
+            use and shuts it down in close()
+        """
+        self.logger = logger
+        self.enable_section_index = enable_section_index
+        self.max_part_size = max_part_size
+        self.state = state
+        self.enable_symbol_index = enable_symbol_index
+        self.max_workers = max_workers
+        self.process_pool = process_pool
+        self._owns_pool = process_pool is None
+        self.written = 0
+        self.unchanged = 0
+
+    def _symbol_pool(self) -> Executor:
+        """Return the worker processes extracting symbols, starting them once."""
+        if self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.process_pool
+
+    def close(self):
+        """Shut down the worker processes started by this writer."""
+        if self._owns_pool and self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
+
+    @staticmethod
+    def part_path(output_file: Path, number: int) -> Path:
+        """Return the path of the given 1-based part of an output file."""
+        return output_file.with_name(
+            f"{output_file.stem}.part{number:03d}{output_file.suffix}"
+        )
+
+    @staticmethod
+    def manifest_path(output_file: Path) -> Path:
+        """Return the path of the part manifest of an output file."""
+        return output_file.with_suffix(".manifest.json")
+
+    def _split_sections(
+        self, header: str, sections: List[EncodedSection]
+    ) -> List[List[EncodedSection]]:
+        """Split sections into parts of at most max_part_size bytes each.
+
+        Parts are only cut at section boundaries, so a single section larger
+        than the limit ends up in a part of its own.
+        """
+        if not self.max_part_size:
+            return [sections]
+
+        header_size = len(header.encode("utf-8")) + len(" (part 000/000)")
+        parts: List[List[EncodedSection]] = [[]]
+        size = header_size
+        for section in sections:
+            section_size = len(section[1]) + 1
+            if parts[-1] and size + section_size > self.max_part_size:
+                parts.append([])
+                size = header_size
+            parts[-1].append(section)
+            size += section_size
+        return parts
+
+    async def write_chunks(
+        self,
+        output_file: Path,
+        chunks: List[Union[bytes, SplicedSection]],
+        group: Optional[str] = None,
+    ) -> bool:
+        """
+        Atomically replace a file with the given chunks if its content changed.
+
+        :param output_file: Path of the file
+        :param chunks: Encoded chunks and spliced sections in write order
+        :param group: Output group to record the file under, None to leave it
+            untracked
+        :return: Whether the file was written
+        """
+        digest = fingerprint(chunks)
+        if self.state is not None and self.state.is_current(output_file, digest):
+            changed = False
+        else:
+            changed = await asyncio.to_thread(write_atomic, output_file, chunks)
+        if self.state is not None:
+            self.state.record(output_file, digest, group)
+        if changed:
+            self.written += 1
+        else:
+            self.unchanged += 1
+            self.logger.debug(f"Unchanged: {output_file}")
+        return changed
+
+    async def _write_part(
+        self,
+        output_file: Path,
+        header: str,
+        sections: List[EncodedSection],
+        group: Optional[str],
+        symbols: Optional[Dict[str, List[SectionSymbol]]] = None,
+    ) -> int:
+        """Write a single document file and return its size in bytes."""
+        index = None
+        if self.enable_section_index or symbols is not None:
+            index = SectionIndex(output_file)
+        chunks = encode_document(header, sections, index)
+        await self.write_chunks(output_file, chunks, group)
+        if self.enable_section_index:
+            await self.write_chunks(index.path, [index.encode()], group)
+            self.logger.debug(f"Created section index: {index.path}")
+        if symbols is not None:
+            symbol_index = SymbolIndex(output_file)
+            for path, offset, _, line_start, _, _ in index.entries:
+                symbol_index.add(path, offset, line_start, symbols.get(path, []))
+            await self.write_chunks(symbol_index.path, [symbol_index.encode()], group)
+            self.logger.debug(
+                f"Created symbol index: {symbol_index.path} "
+                f"({len(symbol_index.entries)} symbols)"
+            )
+        return sum(len(chunk) for chunk in chunks)
+
+    async def _write_manifest(
+        self,
+        output_file: Path,
+        part_files: List[Path],
+        parts: List[List[EncodedSection]],
+        sizes: List[int],
+        group: Optional[str],
+    ) -> Path:
+        """Write the manifest listing the parts of a rolled output in order."""
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "output": output_file.name,
+            "parts": [
+                {
+                    "file": part_file.name,
+                    "bytes": size,
+                    "sections": len(part),
+                    "first": part[0][0].as_posix(),
+                    "last": part[-1][0].as_posix(),
+                }
+                for part_file, part, size in zip(part_files, parts, sizes)
+            ],
+        }
+        manifest_file = self.manifest_path(output_file)
+        await self.write_chunks(
+            manifest_file, [json.dumps(manifest, indent=2).encode("utf-8")], group
+        )
+        return manifest_file
+
+    async def write(
+        self,
+        output_file: Path,
+        header: str,
+        sections: List[Tuple[Path, Union[str, SplicedSection]]],
+        group: Optional[str] = None,
+    ) -> List[Path]:
+        """
+        Write a document, rolling over to part files if it exceeds the size limit.
+
+        :param output_file: Path of the output document
+        :param header: Document header line
+        :param sections: List of (relative file path, section content or
+            spliced section)
+        :param group: Output group to record the files under, None to leave
+            them untracked
+        :return: Paths of the written document files
+        """
+        encoded = [
+            (
+                file_path,
+                section.encode("utf-8") if isinstance(section, str) else section,
+            )
+            for file_path, section in sections
+        ]
+        symbols = None
+        if self.enable_symbol_index:
+            symbols = await extract_section_symbols(
+                encoded, self.max_workers, self._symbol_pool()
+            )
+        parts = self._split_sections(header, encoded)
+        if len(parts) == 1:
+            await self._write_part(output_file, header, encoded, group, symbols)
+            return [output_file]
+
+        # Parts are independent files, so they can be written concurrently
+        part_files = [
+            self.part_path(output_file, number) for number in range(1, len(parts) + 1)
+        ]
+        sizes = await asyncio.gather(
+            *(
+                self._write_part(
+                    part_file,
+                    f"{header} (part {number}/{len(parts)})",
+                    part,
+                    group,
+                    symbols,
+                )
+                for number, (part_file, part) in enumerate(zip(part_files, parts), 1)
+            )
+        )
+        manifest_file = await self._write_manifest(
+            output_file, part_files, parts, sizes, group
+        )
+        self.logger.info(
+            f"Split {output_file.name} into {len(parts)} parts: {manifest_file}"
+        )
+        return part_files
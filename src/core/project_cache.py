@@ -0,0 +1,150 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils import GitIgnoreParser
+
+from .file_processor import FileProcessor
+from .file_record import FileRecord
+
+
+class ContentCache:
+    """
+    A thread-safe LRU cache of decoded file contents.
+
+    Entries are keyed by source path and only served while the file's mtime
+    and size still match the record being loaded.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the ContentCache class.
+
+        :param max_bytes: Approximate upper bound on the cached content size
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Path, Tuple[float, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, record: FileRecord) -> bool:
+        """Attach cached content to the record; return whether it was a hit."""
+        with self._lock:
+            entry = self._entries.get(record.source)
+            if entry is None or entry[:2] != (record.mtime, record.size):
+                return False
+            self._entries.move_to_end(record.source)
+        record.content = entry[2]
+        return True
+
+    def put(self, record: FileRecord):
+        """Cache the content of a loaded record."""
+        with self._lock:
+            old = self._entries.pop(record.source, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[record.source] = (record.mtime, record.size, record.content)
+            self.size += record.size
+            while self.size > self.max_bytes and self._entries:
+                _, (_, size, _) = self._entries.popitem(last=False)
+                self.size -= size
+
+
+class ProjectCache:
+    """
+    Warm per-project state shared by repeated merges of the same project.
+
+    Keeps the parsed .gitignore, directory listings and file contents, each
+    invalidated by modification time, so that a repeated merge only pays for
+    what changed.
+    """
+
+    def __init__(
+        self,
+        project_path: Path,
+        fallback_encoding: Optional[str] = None,
+        io_limit: Optional[asyncio.Semaphore] = None,
+        max_content_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        Initialize the ProjectCache class.
+
+        :param project_path: Root path of the project
+        :param fallback_encoding: Encoding for files that are not UTF-8/16/32
+        :param io_limit: Semaphore bounding concurrent reads across projects
+        :param max_content_bytes: Size limit of the content cache
+        """
+        self.project_path = project_path.resolve()
+        self.contents = ContentCache(max_content_bytes)
+        self.file_processor = FileProcessor(
+            fallback_encoding=fallback_encoding,
+            content_cache=self.contents,
+            io_limit=io_limit,
+        )
+        # Serializes merges writing into this project's output folder
+        self.lock = asyncio.Lock()
+
+        self._gitignore_parser: Optional[GitIgnoreParser] = None
+        self._gitignore_mtime: Optional[int] = None
+        self._listings: Dict[Path, Tuple[int, List[str], List[str]]] = {}
+
+    async def gitignore_parser(self) -> GitIgnoreParser:
+        """Return the parsed .gitignore, re-parsing it only if it changed."""
+        gitignore_path = self.project_path / ".gitignore"
+        try:
+            mtime = gitignore_path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._gitignore_parser is None or mtime != self._gitignore_mtime:
+            parser = GitIgnoreParser(self.project_path)
+            await parser.initialize()
+            self._gitignore_parser, self._gitignore_mtime = parser, mtime
+        return self._gitignore_parser
+
+    def _listing(self, directory: Path) -> Tuple[List[str], List[str]]:
+        """Return (file names, subdirectory names) of a directory, cached by mtime."""
+        mtime = directory.stat().st_mtime_ns
+        cached = self._listings.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        files, directories = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir() and not entry.is_symlink():
+                        directories.append(entry.name)
+                    else:
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        self._listings[directory] = (mtime, files, directories)
+        return files, directories
+
+    def walk(self, skip_directories: Iterable[str] = ()) -> List[Path]:
+        """
+        List every non-directory entry below the project, like ``rglob("*")``.
+
+        Symlinked directories are not descended into. Unchanged directories
+        are served from the cache without a scandir call.
+
+        :param skip_directories: Directory names not to descend into
+        """
+        skip_directories = set(skip_directories)
+        paths = []
+        stack = [self.project_path]
+        while stack:
+            directory = stack.pop()
+            try:
+                files, directories = self._listing(directory)
+            except OSError:
+                self._listings.pop(directory, None)
+                continue
+            paths.extend(directory / name for name in files)
+            stack.extend(
+                directory / name for name in directories if name not in skip_directories
+            )
+        return paths
@@ -0,0 +1,290 @@
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+Text = Union[str, bytes]
+
+MIN_ENTROPY = 4.2  # bits per character; random base64 is above, words are below
+# Shortest quoted string checked for randomness; shorter random strings fall
+# below MIN_ENTROPY too often to tell them apart from identifiers
+MIN_RANDOM_LENGTH = 32
+# Largest share of neighbouring characters that are consecutive ("abc", "321")
+# in a random string; alphabets and charset constants are mostly runs
+MAX_RUN_SHARE = 0.25
+# Key names that make the quoted value assigned to them a secret
+SECRET_NAME = (
+    r"(?i:passw(?:or)?d|pwd|secret|api[_-]?key|access[_-]?token|auth[_-]?token)"
+    r"[\w-]{0,20}[\"']?\s*[:=]\s*$"
+)
+SECRET_NAME_LOOKBACK = 48
+# Longest match, with the context a rule looks back at, that is still found
+# when it straddles two chunks of a file checked in a single streaming pass
+SCAN_OVERLAP = 16 * 1024
+
+REDACTED = "[REDACTED:{rule}]"
+
+
+def _entropy(value: str) -> float:
+    total = len(value)
+    return -sum(
+        count / total * math.log2(count / total) for count in Counter(value).values()
+    )
+
+
+def _looks_like_base64(value: str) -> bool:
+    """Whether a string with ``/`` is standard base64 rather than a path."""
+    return len(value) % 4 == 0 and not any(c in value for c in "-_")
+
+
+def _run_share(value: str) -> float:
+    runs = sum(abs(ord(a) - ord(b)) == 1 for a, b in zip(value, value[1:]))
+    return runs / (len(value) - 1)
+
+
+def _looks_random(value: str) -> bool:
+    """Whether a string looks like a key rather than an identifier or a word."""
+    return (
+        any(c.isdigit() for c in value)
+        and any(c.isalpha() for c in value)
+        and ("/" not in value or _looks_like_base64(value))
+        and _run_share(value) <= MAX_RUN_SHARE
+        and _entropy(value) >= MIN_ENTROPY
+    )
+
+
+_SECRET_NAME = re.compile(SECRET_NAME)
+_SECRET_NAME_BYTES = re.compile(SECRET_NAME.encode("ascii"))
+
+
+def _classify_assignment(text: Text, start: int, end: int) -> Optional[str]:
+    """Keep quoted values only when the key they are assigned to names a secret."""
+    assignment = text.rfind(b":" if isinstance(text, bytes) else ":", 0, start)
+    assignment = max(
+        assignment, text.rfind(b"=" if isinstance(text, bytes) else "=", 0, start)
+    )
+    before = text[max(0, assignment - SECRET_NAME_LOOKBACK) : assignment + 1]
+    pattern = _SECRET_NAME_BYTES if isinstance(text, bytes) else _SECRET_NAME
+    return "password" if pattern.search(before) else None
+
+
+def _classify_random(text: Text, start: int, end: int) -> Optional[str]:
+    """Keep quoted base64-like strings only when they look random."""
+    value = text[start:end]
+    if isinstance(value, bytes):
+        value = value.decode("ascii")
+    return "high_entropy" if _looks_random(value) else None
+
+
+class RedactionRule:
+    """
+    A secret pattern.
+
+    Each rule should start with a literal (``AKIA``, ``ghp_``, ``=``, ...),
+    which lets the regular expression engine skip ahead with a fast
+    substring search; a leading character class is several times slower.
+
+    A named group ``secret`` limits the redaction to that part of the match.
+    ``classify`` returns the rule name to report for a match, or None to
+    keep it.
+    """
+
+    __slots__ = ("name", "pattern", "classify")
+
+    def __init__(
+        self,
+        name: str,
+        pattern: str,
+        classify: Optional[Callable[[Text, int, int], Optional[str]]] = None,
+    ):
+        self.name = name
+        self.pattern = pattern
+        self.classify = classify
+
+
+BUILTIN_RULES: List[RedactionRule] = [
+    RedactionRule(
+        "private_key",
+        r"-----BEGIN[A-Z ]{0,40} PRIVATE KEY( BLOCK)?-----[\s\S]*?"
+        r"-----END[A-Z ]{0,40} PRIVATE KEY( BLOCK)?-----",
+    ),
+    RedactionRule(
+        "aws_access_key",
+        r"A(?:KIA|SIA|GPA|IDA|ROA|NPA|NVA|IPA)[0-9A-Z]{16}(?![0-9A-Za-z])",
+    ),
+    *(
+        RedactionRule(
+            "aws_secret_key",
+            rf"{prefix}(?i:[\w.-]{{0,20}}?(?:secret|key)[\w.-]{{0,20}}?)[\"']?\s*[:=]"
+            r"\s*[\"']?(?P<secret>[A-Za-z0-9/+=]{40})(?![A-Za-z0-9/+=])",
+        )
+        for prefix in ("aws", "AWS", "Aws")
+    ),
+    RedactionRule("google_api_key", r"AIza[0-9A-Za-z_-]{35}"),
+    RedactionRule(
+        "github_token",
+        r"gh(?:[pousr]_[A-Za-z0-9]{36,}|ithub_pat_[A-Za-z0-9_]{22,})",
+    ),
+    RedactionRule("slack_token", r"xox[abprs]-[A-Za-z0-9-]{10,}"),
+    RedactionRule("stripe_key", r"k_live_[0-9A-Za-z]{24,}"),
+    RedactionRule("api_key", r"sk-(?:proj-|ant-)?[A-Za-z0-9_-]{20,}"),
+    RedactionRule(
+        "jwt", r"eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}"
+    ),
+    # Quoted values assigned to a secret-like key, and quoted strings that look
+    # random; one rule per leading character keeps the fast literal search
+    *(
+        RedactionRule(
+            "password",
+            rf"{operator}[ \t]*[\"'](?P<secret>[^\"'\s\\]{{8,}})[\"']",
+            classify=_classify_assignment,
+        )
+        for operator in ("=", ":")
+    ),
+    *(
+        RedactionRule(
+            "high_entropy",
+            rf"{quote}(?P<secret>[A-Za-z0-9+/_-]{{{MIN_RANDOM_LENGTH},}}={{0,2}}){quote}",
+            classify=_classify_random,
+        )
+        for quote in ('"', "'")
+    ),
+]
+
+
+class Finding:
+    """A secret found (and redacted) in a file."""
+
+    __slots__ = ("path", "rule", "line")
+
+    def __init__(self, path: Path, rule: str, line: int):
+        """
+        Initialize the Finding class.
+
+        :param path: Path of the file relative to the project
+        :param rule: Name of the rule that matched
+        :param line: 1-based line of the start of the match
+        """
+        self.path = path
+        self.rule = rule
+        self.line = line
+
+    def __repr__(self) -> str:
+        return f"Finding({self.path.as_posix()}:{self.line}, {self.rule})"
+
+
+class Redactor:
+    """
+    Redacts secrets from file contents in a single splice pass.
+
+    Python's regular expression engine only skips ahead quickly when a
+    pattern starts with a literal; an alternation of all rules is matched
+    position by position and runs an order of magnitude slower. So every
+    rule is anchored on its own literal and scanned separately, the matches
+    of all rules are merged by position, and the content is rebuilt once.
+    Each rule is also compiled for bytes to check files on the zero-copy
+    path without decoding them.
+    """
+
+    def __init__(self, user_rules: Optional[Iterable[Dict[str, str]]] = None):
+        """
+        Initialize the Redactor class.
+
+        :param user_rules: Extra rules as ``{"name": ..., "pattern": ...}``
+        :raises ValueError: If a user rule is not a valid regular expression
+            for both text and bytes
+        """
+        self.rules = [self._compile(rule) for rule in BUILTIN_RULES]
+        for rule in user_rules or ():
+            try:
+                self.rules.append(
+                    self._compile(
+                        RedactionRule(rule.get("name", "custom"), rule["pattern"])
+                    )
+                )
+            except (KeyError, TypeError, ValueError, re.error) as e:
+                raise ValueError(f"Invalid redaction rule {rule!r}: {str(e)}")
+        self.findings: List[Finding] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile(
+        rule: RedactionRule,
+    ) -> Tuple[RedactionRule, "re.Pattern[str]", "re.Pattern[bytes]"]:
+        """Compile a rule for decoded contents and for raw file bytes."""
+        return (
+            rule,
+            re.compile(rule.pattern),
+            re.compile(rule.pattern.encode("utf-8")),
+        )
+
+    def _matches(self, text: Text) -> List[Tuple[int, int, str]]:
+        """Return the non-overlapping (start, end, rule) secrets in the text."""
+        as_bytes = isinstance(text, bytes)
+        matches = []
+        for rule, pattern, bytes_pattern in self.rules:
+            group = "secret" if "secret" in pattern.groupindex else 0
+            for match in (bytes_pattern if as_bytes else pattern).finditer(text):
+                start, end = match.span(group)
+                name = rule.classify(text, start, end) if rule.classify else rule.name
+                if name is not None:
+                    matches.append((start, end, name))
+
+        matches.sort()
+        merged: List[Tuple[int, int, str]] = []
+        for match in matches:
+            if merged and match[0] < merged[-1][1]:
+                if match[1] > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], match[1], merged[-1][2])
+                continue
+            merged.append(match)
+        return merged
+
+    def redact(self, content: str, path: Path) -> str:
+        """
+        Replace the secrets in a file's content and record them as findings.
+
+        :param content: Decoded file content
+        :param path: Path of the file relative to the project
+        :return: Content with every secret replaced by ``[REDACTED:<rule>]``
+        """
+        matches = self._matches(content)
+        if not matches:
+            return content
+
+        parts: List[str] = []
+        findings: List[Finding] = []
+        position, line = 0, 1
+        for start, end, rule in matches:
+            line += content.count("\n", position, start)
+            findings.append(Finding(path, rule, line))
+            parts.append(content[position:start])
+            parts.append(REDACTED.format(rule=rule))
+            line += content.count("\n", start, end)
+            position = end
+        parts.append(content[position:])
+        with self._lock:
+            self.findings.extend(findings)
+        return "".join(parts)
+
+    def has_secrets(self, data: bytes) -> bool:
+        """
+        Check raw file bytes for secrets without decoding them.
+
+        Stops at the first match that a rule keeps.
+        """
+        for rule, pattern, bytes_pattern in self.rules:
+            group = "secret" if "secret" in pattern.groupindex else 0
+            for match in bytes_pattern.finditer(data):
+                if rule.classify is None or rule.classify(data, *match.span(group)):
+                    return True
+        return False
+
+    def format_findings(self) -> str:
+        """Summarize the findings per rule."""
+        files = len({finding.path for finding in self.findings})
+        counts = Counter(finding.rule for finding in self.findings)
+        details = ", ".join(f"{rule} x{count}" for rule, count in counts.items())
+        return f"Redacted {len(self.findings)} secrets in {files} files: {details}"
@@ -0,0 +1,108 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+
+INDEX_VERSION = 1
+INDEX_FIELDS = ("path", "offset", "length", "line_start", "line_end", "sha1")
+
+
+class SectionIndex:
+    """
+    Byte-offset index of the file sections in a generated markdown document.
+
+    Each entry records where a file's section lives inside the output so that
+    consumers can ``seek``/``mmap`` straight to it instead of scanning the
+    whole document.
+    """
+
+    def __init__(self, output_file: Path):
+        """
+        Initialize the SectionIndex class.
+
+        :param output_file: Path of the markdown document being indexed
+        """
+        self.output_file = output_file
+        self.entries: List[Tuple[str, int, int, int, int, str]] = []
+        self._by_path: Dict[str, Tuple[str, int, int, int, int, str]] = {}
+
+    @staticmethod
+    def index_path(output_file: Path) -> Path:
+        """Return the sidecar index path for the given output file."""
+        return output_file.with_suffix(".idx.json")
+
+    @property
+    def path(self) -> Path:
+        return self.index_path(self.output_file)
+
+    def add(self, file_path: Path, offset: int, data: bytes, line_start: int) -> int:
+        """
+        Record a section written at the given byte offset and line.
+
+        :param file_path: Relative path of the file the section belongs to
+        :param offset: Byte offset of the section in the output
+        :param data: Encoded section content
+        :param line_start: 1-based line number the section starts on
+        :return: Number of newlines contained in the section
+        """
+        newlines = data.count(b"\n")
+        self.record(
+            file_path,
+            offset,
+            len(data),
+            line_start,
+            line_start + newlines - (1 if data.endswith(b"\n") else 0),
+            hashlib.sha1(data).hexdigest(),
+        )
+        return newlines
+
+    def record(
+        self,
+        file_path: Path,
+        offset: int,
+        length: int,
+        line_start: int,
+        line_end: int,
+        digest: str,
+    ):
+        """Record a section whose layout and hash are already known."""
+        entry = (file_path.as_posix(), offset, length, line_start, line_end, digest)
+        self.entries.append(entry)
+        self._by_path.setdefault(entry[0], entry)
+
+    def lookup(self, file_path: Path) -> Optional[Tuple[str, int, int, int, int, str]]:
+        """Return the entry for the given relative file path, if present."""
+        return self._by_path.get(file_path.as_posix())
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "output": self.output_file.name,
+            "fields": list(INDEX_FIELDS),
+            "sections": [list(entry) for entry in self.entries],
+        }
+
+    def encode(self) -> bytes:
+        """Return the serialized index."""
+        return json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8")
+
+    async def write(self) -> Path:
+        """Write the index next to the output file and return its path."""
+        async with aiofiles.open(self.path, "wb") as f:
+            await f.write(self.encode())
+        return self.path
+
+    @classmethod
+    async def load(cls, output_file: Path) -> "SectionIndex":
+        """Load the sidecar index of the given output file."""
+        async with aiofiles.open(
+            cls.index_path(output_file), "r", encoding="utf-8"
+        ) as f:
+            data = json.loads(await f.read())
+        index = cls(output_file)
+        index.entries = [tuple(entry) for entry in data["sections"]]
+        for entry in index.entries:
+            index._by_path.setdefault(entry[0], entry)
+        return index
@@ -0,0 +1,407 @@
+import ast
+import asyncio
+import json
+import logging
+import posixpath
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import aiofiles
+
+from .estimator import estimate_tokens
+from .file_record import FileRecord
+from .output_state import write_atomic
+
+CACHE_VERSION = 1
+
+# Weights of the ranking signals, each normalized to [0, 1]
+CENTRALITY_WEIGHT = 0.5
+ENTRY_POINT_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.2
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_ITERATIONS = 50
+PAGERANK_TOLERANCE = 1e-6
+
+ENTRY_POINT_NAMES = {
+    "main.py",
+    "__main__.py",
+    "app.py",
+    "cli.py",
+    "manage.py",
+    "index.js",
+    "index.ts",
+    "main.js",
+    "main.ts",
+}
+
+# Below this many files to parse, a process pool costs more than it saves
+PROCESS_POOL_THRESHOLD = 256
+PARSE_BATCH_SIZE = 128
+
+# An import found in a file: (module or path specifier, relative import level)
+ImportSpec = Tuple[str, int]
+
+
+def parse_python_imports(source: str) -> Tuple[List[ImportSpec], bool]:
+    """
+    Extract the imports of a Python module.
+
+    :return: (imports, whether the module has an ``if __name__ == "__main__"`` block)
+    """
+    tree = ast.parse(source)
+    imports: List[ImportSpec] = []
+    is_entry_point = False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            for alias in node.names:
+                name = f"{module}.{alias.name}" if module else alias.name
+                imports.append((name, node.level))
+            if module:
+                imports.append((module, node.level))
+        elif isinstance(node, ast.If) and not is_entry_point:
+            test = node.test
+            is_entry_point = (
+                isinstance(test, ast.Compare)
+                and isinstance(test.left, ast.Name)
+                and test.left.id == "__name__"
+            )
+    return imports, is_entry_point
+
+
+JS_IMPORT = re.compile(
+    r"""(?:\bfrom\s+|\bimport\s*\(?\s*|\brequire\s*\(\s*)["'](\.{1,2}/[^"']+)["']"""
+)
+
+
+def parse_js_imports(source: str) -> Tuple[List[ImportSpec], bool]:
+    """Extract the relative imports of a JavaScript/TypeScript module."""
+    return [(match, 0) for match in JS_IMPORT.findall(source)], False
+
+
+# Import parsers by file extension; register more languages here
+IMPORT_PARSERS: Dict[str, Callable[[str], Tuple[List[ImportSpec], bool]]] = {
+    "py": parse_python_imports,
+    "js": parse_js_imports,
+    "jsx": parse_js_imports,
+    "mjs": parse_js_imports,
+    "ts": parse_js_imports,
+    "tsx": parse_js_imports,
+}
+
+
+def _parse_files(
+    files: List[Tuple[str, str, str]],
+) -> List[Tuple[str, List[ImportSpec], bool]]:
+    """Parse the imports of a batch of (relative path, source path, extension)."""
+    results = []
+    for path, source_path, extension in files:
+        try:
+            with open(source_path, "rb") as f:
+                source = f.read().decode("utf-8", errors="replace")
+            imports, is_entry_point = IMPORT_PARSERS[extension](source)
+        except (OSError, SyntaxError, ValueError):
+            imports, is_entry_point = [], False
+        results.append((path, imports, is_entry_point))
+    return results
+
+
+class ImportGraph:
+    """
+    Dependency graph between project files, built from their import statements.
+
+    Parsed imports are cached per file by mtime and size, so rebuilding the
+    graph only re-parses files that changed.
+    """
+
+    def __init__(self, records: List[FileRecord], cache_file: Optional[Path] = None):
+        """
+        Initialize the ImportGraph class.
+
+        :param records: Records of the files to include in the graph
+        :param cache_file: Path of the parsed-imports cache, if any
+        """
+        self.records = {record.path.as_posix(): record for record in records}
+        self.cache_file = cache_file
+        self.imports: Dict[str, List[ImportSpec]] = {}
+        self.entry_points: Set[str] = set()
+        self.edges: Dict[str, Set[str]] = {}
+
+    async def _load_cache(self) -> Dict[str, list]:
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+        try:
+            async with aiofiles.open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.loads(await f.read())
+            if data.get("version") != CACHE_VERSION:
+                return {}
+            files = data["files"]
+            # [mtime, size, imports, is_entry_point] per file
+            if all(isinstance(e, list) and len(e) == 4 for e in files.values()):
+                return files
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Unreadable or cut short: parse every file again
+            pass
+        return {}
+
+    async def _save_cache(self):
+        if self.cache_file is None:
+            return
+        files = {
+            path: [
+                record.mtime,
+                record.size,
+                self.imports.get(path, []),
+                path in self.entry_points,
+            ]
+            for path, record in self.records.items()
+            if record.extension in IMPORT_PARSERS
+        }
+        data = {"version": CACHE_VERSION, "files": files}
+        encoded = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(write_atomic, self.cache_file, [encoded])
+
+    async def build(self, max_workers: Optional[int] = None):
+        """
+        Parse imports (in parallel, skipping cached files) and resolve the edges.
+
+        :param max_workers: Number of worker processes used for parsing
+        """
+        cached = await self._load_cache()
+        to_parse = []
+        for path, record in self.records.items():
+            if record.extension not in IMPORT_PARSERS:
+                continue
+            entry = cached.get(path)
+            if entry is not None and entry[:2] == [record.mtime, record.size]:
+                self.imports[path] = [tuple(spec) for spec in entry[2]]
+                if entry[3]:
+                    self.entry_points.add(path)
+            else:
+                to_parse.append((path, str(record.source), record.extension))
+
+        batches = [
+            to_parse[i : i + PARSE_BATCH_SIZE]
+            for i in range(0, len(to_parse), PARSE_BATCH_SIZE)
+        ]
+        if len(to_parse) >= PROCESS_POOL_THRESHOLD:
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(pool, _parse_files, b) for b in batches)
+                )
+        else:
+            results = [await asyncio.to_thread(_parse_files, to_parse)]
+        for batch in results:
+            for path, imports, is_entry_point in batch:
+                self.imports[path] = imports
+                if is_entry_point:
+                    self.entry_points.add(path)
+
+        self.entry_points.update(
+            path
+            for path in self.records
+            if posixpath.basename(path) in ENTRY_POINT_NAMES
+        )
+        self._resolve()
+        if to_parse:
+            await self._save_cache()
+
+    def _module_index(self) -> Dict[str, Optional[str]]:
+        """Map dotted module names to Python files.
+
+        Each file is registered under its full dotted path and every shorter
+        suffix of it (for ``src``-style layouts); suffixes shared by several
+        files are marked ambiguous with None.
+        """
+        full, suffixes = {}, {}
+        for path in self.records:
+            if not path.endswith(".py"):
+                continue
+            parts = path[:-3].split("/")
+            if parts[-1] == "__init__":
+                parts.pop()
+            if not parts:
+                continue
+            full[".".join(parts)] = path
+            for i in range(1, len(parts)):
+                name = ".".join(parts[i:])
+                suffixes[name] = None if name in suffixes else path
+        return {**suffixes, **full}
+
+    def _resolve(self):
+        """Turn the parsed import specifiers into edges between files."""
+        modules = self._module_index()
+        for path, imports in self.imports.items():
+            targets = set()
+            is_python = path.endswith(".py")
+            for spec, level in imports:
+                if is_python:
+                    target = self._resolve_python(path, spec, level, modules)
+                else:
+                    target = self._resolve_relative(path, spec)
+                if target and target != path:
+                    targets.add(target)
+            self.edges[path] = targets
+
+    @staticmethod
+    def _resolve_python(
+        path: str, spec: str, level: int, modules: Dict[str, Optional[str]]
+    ) -> Optional[str]:
+        if level:
+            package = path.split("/")[:-1]
+            if level > 1:
+                package = package[: len(package) - (level - 1)]
+            spec = ".".join(package + ([spec] if spec else []))
+        parts = spec.split(".")
+        # Longest prefix first: "a.b.c" may be a module or a name inside "a.b"
+        for end in range(len(parts), 0, -1):
+            target = modules.get(".".join(parts[:end]))
+            if target:
+                return target
+        return None
+
+    def _resolve_relative(self, path: str, spec: str) -> Optional[str]:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(path), spec))
+        for candidate in (
+            target,
+            *(f"{target}.{ext}" for ext in ("ts", "tsx", "js", "jsx", "mjs")),
+            *(f"{target}/index.{ext}" for ext in ("ts", "tsx", "js", "jsx")),
+        ):
+            if candidate in self.records:
+                return candidate
+        return None
+
+    def pagerank(self) -> Dict[str, float]:
+        """Centrality of each file; importance flows from importers to imports."""
+        nodes = list(self.records)
+        count = len(nodes)
+        if not count:
+            return {}
+        position = {node: i for i, node in enumerate(nodes)}
+        incoming: List[List[int]] = [[] for _ in nodes]
+        out_degree = [0] * count
+        for node, targets in self.edges.items():
+            source = position[node]
+            out_degree[source] = len(targets)
+            for target in targets:
+                incoming[position[target]].append(source)
+        dangling = [i for i in range(count) if not out_degree[i]]
+
+        rank = [1.0 / count] * count
+        for _ in range(PAGERANK_ITERATIONS):
+            share = [
+                PAGERANK_DAMPING * r / degree if degree else 0.0
+                for r, degree in zip(rank, out_degree)
+            ]
+            base = (
+                1.0
+                - PAGERANK_DAMPING
+                + PAGERANK_DAMPING * sum(rank[i] for i in dangling)
+            ) / count
+            new_rank = [base + sum(map(share.__getitem__, inc)) for inc in incoming]
+            delta = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if delta < PAGERANK_TOLERANCE:
+                break
+        return dict(zip(nodes, rank))
+
+    def entry_point_distance(self) -> Dict[str, int]:
+        """Number of import hops from the nearest entry point to each file."""
+        distance = dict.fromkeys(self.entry_points, 0)
+        queue = deque(self.entry_points)
+        while queue:
+            node = queue.popleft()
+            for target in self.edges.get(node, ()):
+                if target not in distance:
+                    distance[target] = distance[node] + 1
+                    queue.append(target)
+        return distance
+
+
+def _normalize(values: Dict[str, float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    low, high = min(values.values()), max(values.values())
+    span = high - low
+    return {key: (value - low) / span if span else 0.0 for key, value in values.items()}
+
+
+def rank_records(graph: ImportGraph) -> List[Tuple[float, FileRecord]]:
+    """
+    Score files by import centrality, entry-point proximity and recency.
+
+    :return: List of (score, record), best first
+    """
+    centrality = _normalize(graph.pagerank())
+    distance = graph.entry_point_distance()
+    recency = _normalize({path: r.mtime for path, r in graph.records.items()})
+    scored = []
+    for path, record in graph.records.items():
+        proximity = 1.0 / (1 + distance[path]) if path in distance else 0.0
+        score = (
+            CENTRALITY_WEIGHT * centrality.get(path, 0.0)
+            + ENTRY_POINT_WEIGHT * proximity
+            + RECENCY_WEIGHT * recency.get(path, 0.0)
+        )
+        scored.append((score, record))
+    scored.sort(key=lambda item: (-item[0], item[1].path))
+    return scored
+
+
+def fill_budget(
+    ranked: Iterable[Tuple[float, FileRecord]], budget: int, unit: str = "tokens"
+) -> List[FileRecord]:
+    """
+    Greedily take the best-ranked files that still fit in the budget.
+
+    :param ranked: (score, record) pairs, best first
+    :param budget: Maximum total size
+    :param unit: "tokens" (estimated) or "bytes"
+    :return: Selected records
+    """
+    cost = estimate_tokens if unit == "tokens" else (lambda size: size)
+    selected, remaining = [], budget
+    for _, record in ranked:
+        size = cost(record.size)
+        if size <= remaining:
+            selected.append(record)
+            remaining -= size
+    return selected
+
+
+async def select_records(
+    records: List[FileRecord],
+    budget: int,
+    unit: str,
+    cache_file: Optional[Path],
+    logger: logging.Logger,
+    max_workers: Optional[int] = None,
+) -> List[FileRecord]:
+    """
+    Select the most relevant files that fit in the budget.
+
+    :param records: Candidate file records
+    :param budget: Maximum total size
+    :param unit: "tokens" (estimated) or "bytes"
+    :param cache_file: Path of the parsed-imports cache, if any
+    :param logger: Logger object
+    :param max_workers: Number of worker processes used for parsing
+    :return: Selected records, in their original order
+    """
+    graph = ImportGraph(records, cache_file)
+    await graph.build(max_workers=max_workers)
+    selected = fill_budget(rank_records(graph), budget, unit)
+    keep = {id(record) for record in selected}
+    logger.info(
+        f"Selected {len(selected)} of {len(records)} files "
+        f"within a budget of {budget:,} {unit}"
+    )
+    return [record for record in records if id(record) in keep]
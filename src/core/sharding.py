@@ -0,0 +1,119 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import aiofiles
+
+MANIFEST_VERSION = 1
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse a ``K/N`` shard specification.
+
+    :param value: Shard specification, e.g. ``"2/8"``
+    :return: (shard number, shard count), with 1 <= K <= N
+    """
+    try:
+        number, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected K/N")
+    if not 1 <= number <= count:
+        raise ValueError(f"Invalid shard '{value}', K must be between 1 and N")
+    return number, count
+
+
+def shard_of(relative_path: Path, count: int) -> int:
+    """
+    Return the 1-based shard a file belongs to.
+
+    The hash only depends on the file's relative POSIX path, so every worker
+    assigns files the same way regardless of platform or walk order.
+    """
+    digest = hashlib.sha1(relative_path.as_posix().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+class ShardManifest:
+    """Describes the partial output written by one shard."""
+
+    def __init__(
+        self,
+        project: str,
+        number: int,
+        count: int,
+        document: str,
+        structure: Optional[str] = None,
+    ):
+        """
+        Initialize the ShardManifest class.
+
+        :param project: Name of the project
+        :param number: 1-based shard number
+        :param count: Total number of shards
+        :param document: File name of the partial document of rendered sections
+        :param structure: File name of the tree structure, if this shard wrote it
+        """
+        self.project = project
+        self.number = number
+        self.count = count
+        self.document = document
+        self.structure = structure
+
+    @staticmethod
+    def stem(project: str, number: int, count: int) -> str:
+        return f"{project}_shard-{number}-of-{count}"
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "project": self.project,
+            "shard": self.number,
+            "shards": self.count,
+            "document": self.document,
+            "structure": self.structure,
+        }
+
+    async def write(self, shard_dir: Path) -> Path:
+        """Write the manifest into the shard directory and return its path."""
+        stem = self.stem(self.project, self.number, self.count)
+        manifest_file = shard_dir / f"{stem}.shard.json"
+        async with aiofiles.open(manifest_file, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(self.to_dict(), indent=2))
+        return manifest_file
+
+    @classmethod
+    async def load_all(cls, shard_dir: Path, project: str) -> List["ShardManifest"]:
+        """
+        Load the manifests of a complete set of shards, ordered by shard number.
+
+        :raises ValueError: If shards are missing or belong to different runs
+        """
+        manifests = []
+        for manifest_file in sorted(
+            shard_dir.glob(f"{project}_shard-*-of-*.shard.json")
+        ):
+            async with aiofiles.open(manifest_file, "r", encoding="utf-8") as f:
+                data = json.loads(await f.read())
+            manifests.append(
+                cls(
+                    project=data["project"],
+                    number=data["shard"],
+                    count=data["shards"],
+                    document=data["document"],
+                    structure=data.get("structure"),
+                )
+            )
+        if not manifests:
+            raise ValueError(f"No shard manifests found in {shard_dir}")
+
+        counts = {manifest.count for manifest in manifests}
+        if len(counts) != 1:
+            raise ValueError(f"Shard manifests disagree on the shard count: {counts}")
+        count = counts.pop()
+        numbers = {manifest.number for manifest in manifests}
+        missing = sorted(set(range(1, count + 1)) - numbers)
+        if missing:
+            raise ValueError(f"Missing shards {missing} of {count}")
+        return sorted(manifests, key=lambda manifest: manifest.number)
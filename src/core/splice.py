@@ -0,0 +1,266 @@
+import codecs
+import hashlib
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from src.utils.encoding import SAMPLE_SIZE
+
+from .redaction import SCAN_OVERLAP, Redactor
+
+# Bytes that str.strip() removes and that are single bytes in UTF-8
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+_local = threading.local()
+
+
+def _scan_buffer() -> bytearray:
+    """Return the reusable scan buffer of the current thread."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray(SCAN_CHUNK_SIZE)
+    return buffer
+
+
+class SplicedSection:
+    """
+    A file section whose body is copied straight from the source file.
+
+    The body never becomes a Python string: only the small prefix (heading and
+    opening fence) and suffix (closing fence) are held in memory.
+    """
+
+    __slots__ = ("source", "prefix", "start", "end", "suffix", "newlines", "digest")
+
+    def __init__(
+        self,
+        source: Path,
+        prefix: bytes,
+        start: int,
+        end: int,
+        suffix: bytes,
+        newlines: int,
+        digest: str,
+    ):
+        self.source = source
+        self.prefix = prefix
+        self.start = start
+        self.end = end
+        self.suffix = suffix
+        self.newlines = newlines
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return len(self.prefix) + self.end - self.start + len(self.suffix)
+
+
+def _read_at(f, view: memoryview, offset: int) -> int:
+    """Read into view from the given offset of an unbuffered file."""
+    f.seek(offset)
+    length = 0
+    while length < len(view):
+        read = f.readinto(view[length:])
+        if not read:
+            break
+        length += read
+    return length
+
+
+def _trimmed_bounds(f, size: int, buffer: bytearray) -> Optional[Tuple[int, int]]:
+    """
+    Find the byte range left after stripping leading and trailing whitespace.
+
+    :return: (start, end) offsets, or None if a non-ASCII character sits at
+        either edge and the Unicode-aware str.strip() has to decide
+    """
+    view = memoryview(buffer)
+    start = 0
+    while start < size:
+        length = _read_at(f, view[: min(len(buffer), size - start)], start)
+        chunk = buffer[:length].lstrip(ASCII_WHITESPACE)
+        if chunk:
+            if chunk[0] >= 0x80:
+                return None
+            start += length - len(chunk)
+            break
+        start += length
+
+    end = size
+    while end > start:
+        length = min(len(buffer), end - start)
+        _read_at(f, view[:length], end - length)
+        chunk = buffer[:length].rstrip(ASCII_WHITESPACE)
+        if chunk:
+            if chunk[-1] >= 0x80:
+                return None
+            end -= length - len(chunk)
+            break
+        end -= length
+
+    return start, end
+
+
+def scan_file(
+    file_path: Path,
+    prefix: bytes,
+    suffix: bytes,
+    redactor: Optional[Redactor] = None,
+) -> Optional[SplicedSection]:
+    """
+    Scan a file's raw bytes and describe its section without decoding it.
+
+    Validates UTF-8 chunk by chunk, trims surrounding whitespace by offset and
+    computes the newline count and hash of the finished section. With a
+    redactor, each chunk is also checked for secrets in the same pass; chunks
+    are checked together with the end of the previous one, so secrets that
+    straddle two chunks are found too.
+
+    :param file_path: Path of the source file
+    :param prefix: Encoded heading and opening fence of the section
+    :param suffix: Encoded closing fence of the section
+    :param redactor: Redactor whose rules the content must not match
+    :return: SplicedSection, or None if the file has to go through the regular
+        decoding path (invalid UTF-8, non-ASCII whitespace at the edges, a
+        backtick run that needs a longer code fence, carriage returns, or
+        secrets to redact)
+    """
+    buffer = _scan_buffer()
+    with open(file_path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        bounds = _trimmed_bounds(f, size, buffer)
+        if bounds is None:
+            return None
+        start, end = bounds
+
+        digest = hashlib.sha1(prefix)
+        newlines = prefix.count(b"\n") + suffix.count(b"\n")
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        view = memoryview(buffer)
+        position = start
+        tail = b""
+        overlap = b""
+        try:
+            while position < end:
+                chunk = view[: min(len(buffer), end - position)]
+                length = _read_at(f, chunk, position)
+                if length < len(chunk):
+                    raise OSError(f"{file_path} shrank while being scanned")
+                # NUL bytes in the sample mean binary data or UTF-16, which
+                # the decoding path skips or converts (leading whitespace
+                # holds no NULs, so the sample starts at the trimmed start)
+                if (
+                    position == start
+                    and buffer.find(b"\0", 0, max(0, min(length, SAMPLE_SIZE - start)))
+                    >= 0
+                ):
+                    return None
+                # isascii() validates without decoding; only decode otherwise
+                ascii_chunk = (
+                    buffer.isascii()
+                    if length == len(buffer)
+                    else buffer[:length].isascii()
+                )
+                if decoder.getstate()[0] or not ascii_chunk:
+                    decoder.decode(chunk)
+                # The default fence only works if the content has no ``` run,
+                # and carriage returns need newline translation
+                if (
+                    buffer.find(b"```", 0, length) >= 0
+                    or b"```" in (tail + buffer[: min(length, 2)])
+                    or buffer.find(b"\r", 0, length) >= 0
+                ):
+                    return None
+                tail = buffer[max(0, length - 2) : length]
+                if redactor is not None:
+                    window = overlap + chunk
+                    if redactor.has_secrets(window):
+                        return None
+                    overlap = window[-SCAN_OVERLAP:]
+                digest.update(chunk)
+                newlines += buffer.count(b"\n", 0, length)
+                position += length
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return None
+        digest.update(suffix)
+
+    return SplicedSection(
+        source=file_path,
+        prefix=prefix,
+        start=start,
+        end=end,
+        suffix=suffix,
+        newlines=newlines,
+        digest=digest.hexdigest(),
+    )
+
+
+def _copy_range(src_fd: int, dst_fd: int, start: int, count: int):
+    """Copy count bytes from src_fd at start to the current position of dst_fd.
+
+    Uses copy_file_range, then sendfile, then an mmap-backed write, depending
+    on what the platform and file systems support.
+    """
+    if not count:
+        return
+    if hasattr(os, "copy_file_range"):
+        try:
+            while count:
+                copied = os.copy_file_range(src_fd, dst_fd, count, start)
+                if not copied:
+                    raise OSError("Source file shrank while being copied")
+                start += copied
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno is None:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while count:
+                copied = os.sendfile(dst_fd, src_fd, start, count)
+                if not copied:
+                    raise OSError("Source file shrank while being copied")
+                start += copied
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno is None:
+                raise
+    with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            while count:
+                written = os.write(dst_fd, view[start : start + count])
+                start += written
+                count -= written
+
+
+def _write_all(fd: int, data: bytes):
+    """Write all of data to fd, retrying on short writes."""
+    with memoryview(data) as view:
+        while view:
+            view = view[os.write(fd, view) :]
+
+
+def write_spliced(output_file: Path, chunks: List[Union[bytes, SplicedSection]]):
+    """
+    Write a document made of encoded chunks and spliced file bodies.
+
+    :param output_file: Path of the output document
+    :param chunks: Encoded chunks and spliced sections in write order
+    """
+    with open(output_file, "wb", buffering=0) as out_file:
+        out_fd = out_file.fileno()
+        for chunk in chunks:
+            if isinstance(chunk, SplicedSection):
+                _write_all(out_fd, chunk.prefix)
+                with open(chunk.source, "rb") as src_file:
+                    _copy_range(
+                        src_file.fileno(), out_fd, chunk.start, chunk.end - chunk.start
+                    )
+                _write_all(out_fd, chunk.suffix)
+            else:
+                _write_all(out_fd, chunk)
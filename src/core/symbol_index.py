@@ -0,0 +1,364 @@
+import ast
+import asyncio
+import bisect
+import json
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import aiofiles
+
+from .splice import SplicedSection
+
+SYMBOL_INDEX_VERSION = 1
+SYMBOL_FIELDS = ("name", "kind", "path", "line", "offset")
+
+# Python sections are parsed in worker processes once there are this many
+PROCESS_POOL_THRESHOLD = 256
+EXTRACT_BATCH_SIZE = 128
+
+# (name, kind, 0-based line in the body, byte offset of that line in the body)
+BodySymbol = Tuple[str, str, int, int]
+# (name, kind, 0-based line in the section, byte offset of that line in the section)
+SectionSymbol = Tuple[str, str, int, int]
+# Encoded section, or (source, start, end, prefix, suffix) of a spliced one
+SectionSource = Union[bytes, Tuple[str, int, int, bytes, bytes]]
+
+_IDENTIFIER = rb"[A-Za-z_$][\w$]*"
+_MODIFIERS = (
+    rb"(?:(?:public|private|protected|internal|static|final|abstract|sealed|"
+    rb"open|data|partial|inline|export|default|declare|async)\s+)*"
+)
+
+# Definitions at the start of a line, i.e. top level in brace languages
+_JS_TAGS = [
+    (rb"^" + _MODIFIERS + rb"function\*?\s+(" + _IDENTIFIER + rb")", "function"),
+    (rb"^" + _MODIFIERS + rb"class\s+(" + _IDENTIFIER + rb")", "class"),
+    (
+        rb"^" + _MODIFIERS + rb"(?:const|let|var)\s+(" + _IDENTIFIER + rb")\s*="
+        rb"\s*(?:async\s*)?(?:function\b|\([^)\n]*\)\s*=>|" + _IDENTIFIER + rb"\s*=>)",
+        "function",
+    ),
+]
+_TS_TAGS = _JS_TAGS + [
+    (
+        rb"^" + _MODIFIERS + rb"(?:interface|type|enum)\s+(" + _IDENTIFIER + rb")",
+        "type",
+    ),
+]
+_GO_TAGS = [
+    (rb"^func\s+(?:\([^)\n]*\)\s*)?(\w+)", "function"),
+    (rb"^type\s+(\w+)", "type"),
+]
+_RUST_TAGS = [
+    (
+        rb"^(?:pub(?:\([^)\n]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?"
+        rb"(?:extern\s+\"[^\"\n]*\"\s+)?fn\s+(\w+)",
+        "function",
+    ),
+    (
+        rb"^(?:pub(?:\([^)\n]*\))?\s+)?(?:struct|enum|trait|union|type|mod)\s+(\w+)",
+        "type",
+    ),
+]
+_JVM_TAGS = [
+    (
+        rb"^" + _MODIFIERS + rb"(?:class|interface|enum|record|object|struct|protocol|"
+        rb"trait)\s+(\w+)",
+        "class",
+    ),
+    (rb"^" + _MODIFIERS + rb"(?:fun|func|def)\s+(?:<[^>\n]*>\s*)?(\w+)", "function"),
+]
+_C_TAGS = [
+    (
+        rb"^(?:typedef\s+)?(?:struct|class|enum|union)\s+(\w+)\s*(?::[^;\n]*)?\{?\s*$",
+        "type",
+    ),
+    (
+        # Type words and the separators between them share no character, so
+        # a line of stars and ampersands cannot be split up in many ways
+        rb"^(?!(?:if|else|for|while|switch|return|do)\b)"
+        rb"(?:[\w:<>,]+(?:[ \t]+|[ \t]*[*&]+[ \t]*))+"
+        rb"(\w+)\s*\([^;{}\n]*\)\s*(?:const\s*)?\{?\s*$",
+        "function",
+    ),
+    (rb"^#define\s+(\w+)", "macro"),
+]
+_RUBY_TAGS = [
+    (rb"^(?:class|module)\s+([\w:]+)", "class"),
+    (rb"^def\s+(?:self\.)?(\w+[?!=]?)", "function"),
+]
+_PHP_TAGS = [
+    (rb"^(?:(?:abstract|final)\s+)?(?:class|interface|trait|enum)\s+(\w+)", "class"),
+    (rb"^function\s+(\w+)", "function"),
+]
+_SHELL_TAGS = [
+    (rb"^(?:function\s+)?([A-Za-z_][\w-]*)\s*\(\)\s*\{?", "function"),
+]
+
+_TAGS_BY_EXTENSION = {
+    **dict.fromkeys(("js", "jsx", "mjs", "cjs"), _JS_TAGS),
+    **dict.fromkeys(("ts", "tsx", "mts", "cts"), _TS_TAGS),
+    "go": _GO_TAGS,
+    "rs": _RUST_TAGS,
+    **dict.fromkeys(("java", "kt", "kts", "scala", "cs", "swift", "dart"), _JVM_TAGS),
+    **dict.fromkeys(("c", "h", "cc", "cpp", "cxx", "hpp", "hh"), _C_TAGS),
+    "rb": _RUBY_TAGS,
+    "php": _PHP_TAGS,
+    **dict.fromkeys(("sh", "bash", "zsh"), _SHELL_TAGS),
+}
+
+# One pattern per tag; a single alternation would defeat the regex engine's
+# fast paths and report only one match per position
+TAGGERS: Dict[str, List[Tuple["re.Pattern", str]]] = {
+    extension: [(re.compile(pattern, re.MULTILINE), kind) for pattern, kind in tags]
+    for extension, tags in _TAGS_BY_EXTENSION.items()
+}
+PYTHON_EXTENSIONS = {"py", "pyi", "pyw"}
+
+
+def _line_starts(body: bytes) -> List[int]:
+    """Return the byte offset of the start of every line."""
+    starts = [0]
+    position = body.find(b"\n")
+    while position >= 0:
+        starts.append(position + 1)
+        position = body.find(b"\n", position + 1)
+    return starts
+
+
+def python_symbols(body: bytes) -> List[BodySymbol]:
+    """Top-level functions and classes of a Python file, with their methods."""
+    try:
+        tree = ast.parse(body)
+    except (SyntaxError, ValueError):
+        return []
+    starts = _line_starts(body)
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append((node.name, "function", node.lineno - 1))
+        elif isinstance(node, ast.ClassDef):
+            symbols.append((node.name, "class", node.lineno - 1))
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols.append(
+                        (f"{node.name}.{child.name}", "method", child.lineno - 1)
+                    )
+    return [(name, kind, line, starts[line]) for name, kind, line in symbols]
+
+
+def tagged_symbols(body: bytes, extension: str) -> List[BodySymbol]:
+    """Definitions found by the regular expression tagger of a language."""
+    matches = []
+    for pattern, kind in TAGGERS.get(extension, ()):
+        for match in pattern.finditer(body):
+            matches.append((match.start(), match.group(1).decode("utf-8"), kind))
+    matches.sort()
+
+    symbols = []
+    line, position = 0, 0
+    for start, name, kind in matches:
+        line += body.count(b"\n", position, start)
+        position = start
+        symbols.append((name, kind, line, start))
+    return symbols
+
+
+def extract_symbols(body: bytes, extension: str) -> List[BodySymbol]:
+    """
+    Extract the top-level symbols of a file.
+
+    :param body: Encoded file content
+    :param extension: File extension without the leading dot
+    :return: List of (name, kind, 0-based line, byte offset of the line)
+    """
+    if extension in PYTHON_EXTENSIONS:
+        return python_symbols(body)
+    return tagged_symbols(body, extension)
+
+
+def _section_symbols(source: SectionSource, extension: str) -> List[SectionSymbol]:
+    """Extract the symbols of a rendered section, positioned within the section."""
+    if isinstance(source, tuple):
+        source_path, start, end, prefix, suffix = source
+        with open(source_path, "rb") as f:
+            f.seek(start)
+            data = prefix + f.read(end - start) + suffix
+    else:
+        data = source
+    # The section is a heading line, an opening fence line, the content and
+    # a closing fence line
+    heading_end = data.find(b"\n")
+    body_start = data.find(b"\n", heading_end + 1) + 1
+    fence = len(data[heading_end + 1 : body_start]) - len(
+        data[heading_end + 1 : body_start].lstrip(b"`")
+    )
+    body = data[body_start : len(data) - fence - 2]
+    return [
+        (name, kind, line + 2, body_start + offset)
+        for name, kind, line, offset in extract_symbols(body, extension)
+    ]
+
+
+def _extract_batch(
+    batch: List[Tuple[str, SectionSource, str]],
+) -> List[Tuple[str, List[SectionSymbol]]]:
+    """Extract the symbols of a batch of (path, section source, extension)."""
+    results = []
+    for path, source, extension in batch:
+        try:
+            results.append((path, _section_symbols(source, extension)))
+        except (OSError, UnicodeDecodeError):
+            results.append((path, []))
+    return results
+
+
+async def extract_section_symbols(
+    sections: List[Tuple[Path, Union[bytes, SplicedSection]]],
+    max_workers: Optional[int] = None,
+    pool: Optional[Executor] = None,
+) -> Dict[str, List[SectionSymbol]]:
+    """
+    Extract the symbols of encoded or spliced sections.
+
+    Python files are parsed with ``ast``, in worker processes when there are
+    many of them; other languages go through a regular expression tagger.
+
+    :param sections: List of (relative file path, encoded or spliced section)
+    :param max_workers: Maximum number of worker processes
+    :param pool: Worker processes to use instead of starting a pool for
+        this call
+    :return: Symbols positioned within their section, by relative POSIX path
+    """
+    work = []
+    for file_path, section in sections:
+        extension = file_path.suffix[1:]
+        if extension not in PYTHON_EXTENSIONS and extension not in TAGGERS:
+            continue
+        if isinstance(section, SplicedSection):
+            source = (
+                str(section.source),
+                section.start,
+                section.end,
+                section.prefix,
+                section.suffix,
+            )
+        else:
+            source = section
+        work.append((file_path.as_posix(), source, extension))
+
+    python_count = sum(1 for _, _, extension in work if extension in PYTHON_EXTENSIONS)
+    if python_count >= PROCESS_POOL_THRESHOLD:
+        batches = [
+            work[i : i + EXTRACT_BATCH_SIZE]
+            for i in range(0, len(work), EXTRACT_BATCH_SIZE)
+        ]
+        loop = asyncio.get_running_loop()
+        if pool is not None:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, _extract_batch, b) for b in batches)
+            )
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(pool, _extract_batch, b) for b in batches)
+                )
+    else:
+        results = [await asyncio.to_thread(_extract_batch, work)]
+    return {path: symbols for batch in results for path, symbols in batch}
+
+
+class SymbolIndex:
+    """
+    Sorted index of the symbols defined in a generated markdown document.
+
+    Maps each symbol name to the file defining it, the line in the output
+    and the byte offset of that line, so "where is X defined" is a binary
+    search instead of a scan of the whole document.
+    """
+
+    def __init__(self, output_file: Path):
+        """
+        Initialize the SymbolIndex class.
+
+        :param output_file: Path of the markdown document being indexed
+        """
+        self.output_file = output_file
+        self.entries: List[Tuple[str, str, str, int, int]] = []
+        self._names: Optional[List[str]] = None
+
+    @staticmethod
+    def index_path(output_file: Path) -> Path:
+        """Return the sidecar symbol index path for the given output file."""
+        return output_file.with_suffix(".symbols.json")
+
+    @property
+    def path(self) -> Path:
+        return self.index_path(self.output_file)
+
+    def add(
+        self,
+        file_path: str,
+        section_offset: int,
+        section_line: int,
+        symbols: List[SectionSymbol],
+    ):
+        """
+        Record the symbols of a section written at the given offset and line.
+
+        :param file_path: Relative POSIX path of the file the section belongs to
+        :param section_offset: Byte offset of the section in the output
+        :param section_line: 1-based line number the section starts on
+        :param symbols: Symbols positioned within the section
+        """
+        for name, kind, line, offset in symbols:
+            self.entries.append(
+                (name, kind, file_path, section_line + line, section_offset + offset)
+            )
+        self._names = None
+
+    def encode(self) -> bytes:
+        """Return the serialized index, with file paths stored once."""
+        self.entries.sort()
+        files = sorted({entry[2] for entry in self.entries})
+        numbers = {path: number for number, path in enumerate(files)}
+        data = {
+            "version": SYMBOL_INDEX_VERSION,
+            "output": self.output_file.name,
+            "fields": list(SYMBOL_FIELDS),
+            "files": files,
+            "symbols": [
+                [name, kind, numbers[path], line, offset]
+                for name, kind, path, line, offset in self.entries
+            ],
+        }
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    async def load(cls, output_file: Path) -> "SymbolIndex":
+        """Load the sidecar symbol index of the given output file."""
+        async with aiofiles.open(cls.index_path(output_file), "rb") as f:
+            data = json.loads(await f.read())
+        index = cls(output_file)
+        files = data["files"]
+        index.entries = [
+            (name, kind, files[number], line, offset)
+            for name, kind, number, line, offset in data["symbols"]
+        ]
+        return index
+
+    def lookup(self, name: str) -> List[Tuple[str, str, str, int, int]]:
+        """
+        Find where a symbol is defined.
+
+        :param name: Symbol name; methods are named ``Class.method``
+        :return: Matching (name, kind, path, line, offset) entries
+        """
+        if self._names is None:
+            self.entries.sort()
+            self._names = [entry[0] for entry in self.entries]
+        start = bisect.bisect_left(self._names, name)
+        end = bisect.bisect_right(self._names, name, start)
+        return self.entries[start:end]
@@ -0,0 +1,287 @@
+import ast
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+TRAILING_WHITESPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+BLANK_LINE_RUN = re.compile(r"\n(?:[ \t]*\n){2,}")
+LICENSE_WORDS = re.compile(r"licen[cs]e|copyright|spdx-license-identifier", re.I)
+
+C_STYLE = {
+    "c", "h", "cc", "cpp", "cxx", "hpp", "cs", "java", "js", "jsx", "mjs", "ts",
+    "tsx", "go", "rs", "swift", "kt", "kts", "scala", "dart", "php",
+}  # fmt: skip
+BLOCK_ONLY_STYLE = {"css", "scss", "less"}
+HASH_STYLE = {"sh", "bash", "zsh", "rb", "pl", "r", "yaml", "yml", "toml", "cfg"}
+MARKUP_STYLE = {"html", "htm", "xml", "vue", "svelte"}
+
+_STRING = r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'"
+_TEMPLATE = r"|`(?:\\.|[^`\\])*`"
+
+# Strings are matched (and kept) so that comment markers inside them survive;
+# whole-line comments take their line with them
+_C_COMMENTS = re.compile(
+    rf"({_STRING}{_TEMPLATE})"
+    r"|^[ \t]*(?://[^\n]*|/\*.*?\*/)[ \t]*(?:\n|\Z)"
+    r"|[ \t]*(?://[^\n]*|/\*.*?\*/)",
+    re.DOTALL | re.MULTILINE,
+)
+_BLOCK_COMMENTS = re.compile(
+    rf"({_STRING})|^[ \t]*/\*.*?\*/[ \t]*(?:\n|\Z)|[ \t]*/\*.*?\*/",
+    re.DOTALL | re.MULTILINE,
+)
+_HASH_COMMENTS = re.compile(
+    rf"({_STRING})|^[ \t]*#(?!!)[^\n]*(?:\n|\Z)|[ \t]+#[^\n]*",
+    re.MULTILINE,
+)
+_PYTHON_COMMENTS = re.compile(
+    r'("""(?:\\.|[^\\])*?"""|\'\'\'(?:\\.|[^\\])*?\'\'\'|'
+    rf"{_STRING})"
+    r"|^[ \t]*#[^\n]*(?:\n|\Z)|[ \t]*#[^\n]*",
+    re.DOTALL | re.MULTILINE,
+)
+_MARKUP_COMMENTS = re.compile(
+    r"()^[ \t]*<!--.*?-->[ \t]*(?:\n|\Z)|<!--.*?-->", re.DOTALL | re.MULTILINE
+)
+
+# Leading comment block, after an optional shebang or encoding line
+_LICENSE_PREAMBLE = r"\A((?:#![^\n]*\n)?(?:[ \t]*#[^\n]*coding[:=][^\n]*\n)?)"
+_LEADING_HASH = re.compile(_LICENSE_PREAMBLE + r"(\s*(?:[ \t]*#[^\n]*(?:\n|\Z))+\s*)")
+_LEADING_C = re.compile(
+    _LICENSE_PREAMBLE + r"(\s*(?:/\*.*?\*/|(?:[ \t]*//[^\n]*(?:\n|\Z))+)\s*)",
+    re.DOTALL,
+)
+_LEADING_MARKUP = re.compile(r"\A()(\s*<!--.*?-->\s*)", re.DOTALL)
+
+
+_PREAMBLE = re.compile(_LICENSE_PREAMBLE)
+_NEWLINE = re.compile("\n")
+_STATEMENT_SEPARATOR = re.compile(r"[ \t]*;[ \t]*")
+_DOCUMENTED = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def _keep_strings(match: "re.Match") -> str:
+    return match.group(1) or ""
+
+
+def _strip_preserving_preamble(pattern: "re.Pattern", text: str) -> str:
+    """Remove the comments matched by the pattern, except a shebang or encoding line."""
+    preamble = _PREAMBLE.match(text).group(1)
+    return preamble + pattern.sub(_keep_strings, text[len(preamble) :])
+
+
+def strip_trailing_whitespace(text: str, extension: str) -> str:
+    """Remove spaces and tabs at the end of every line."""
+    return TRAILING_WHITESPACE.sub("", text)
+
+
+def collapse_blank_lines(text: str, extension: str) -> str:
+    """Collapse runs of blank lines into a single blank line."""
+    return BLANK_LINE_RUN.sub("\n\n", text)
+
+
+def remove_license_header(text: str, extension: str) -> str:
+    """Remove a leading comment block that mentions a license or copyright."""
+    if extension == "py" or extension in HASH_STYLE:
+        pattern = _LEADING_HASH
+    elif extension in C_STYLE or extension in BLOCK_ONLY_STYLE:
+        pattern = _LEADING_C
+    elif extension in MARKUP_STYLE:
+        pattern = _LEADING_MARKUP
+    else:
+        return text
+    match = pattern.match(text)
+    if match is None or not LICENSE_WORDS.search(match.group(2)):
+        return text
+    return match.group(1) + text[match.end() :]
+
+
+def strip_comments(text: str, extension: str) -> str:
+    """
+    Remove comments, keeping string literals intact.
+
+    Every language is handled by a single regular expression scan, which
+    does not recognize JavaScript regular expression literals.
+    """
+    if extension == "py":
+        return _strip_preserving_preamble(_PYTHON_COMMENTS, text)
+    if extension in C_STYLE:
+        return _C_COMMENTS.sub(_keep_strings, text)
+    if extension in BLOCK_ONLY_STYLE:
+        return _BLOCK_COMMENTS.sub(_keep_strings, text)
+    if extension in HASH_STYLE:
+        return _strip_preserving_preamble(_HASH_COMMENTS, text)
+    if extension in MARKUP_STYLE:
+        return _MARKUP_COMMENTS.sub(_keep_strings, text)
+    return text
+
+
+def strip_docstrings(text: str, extension: str) -> str:
+    """Remove Python docstrings."""
+    if extension != "py":
+        return text
+    return _strip_python_docstrings(text)
+
+
+def _strip_python_docstrings(text: str) -> str:
+    """Remove the docstrings of modules, classes and functions."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return text
+    offsets = _line_offsets(text)
+
+    def column(row: int, offset: int) -> int:
+        # ast offsets count UTF-8 bytes
+        line = text[offsets[row - 1] : offsets[row] if row < len(offsets) else None]
+        if line.isascii():
+            return offset
+        return len(line.encode("utf-8")[:offset].decode("utf-8", errors="ignore"))
+
+    removals = []
+    stack: List[ast.AST] = [tree]
+    while stack:
+        node = stack.pop()
+        body = getattr(node, "body", None)
+        if not isinstance(body, list):
+            continue
+        stack.extend(body)
+        for field in ("orelse", "finalbody", "handlers"):
+            stack.extend(getattr(node, field, ()))
+        if not isinstance(node, _DOCUMENTED) or not body:
+            continue
+        first = body[0]
+        if not (
+            isinstance(first, ast.Expr)
+            and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str)
+        ):
+            continue
+        # A docstring that is the whole body of a class or function becomes "..."
+        replacement = "..." if len(body) == 1 and node is not tree else ""
+        removals.append(
+            (
+                (first.lineno, column(first.lineno, first.col_offset)),
+                (first.end_lineno, column(first.end_lineno, first.end_col_offset)),
+                replacement,
+            )
+        )
+    if not removals:
+        return text
+    return _apply_removals(text, offsets, sorted(removals))
+
+
+def _line_offsets(text: str) -> List[int]:
+    """Return the offset of every line start.
+
+    Only ``\n`` ends a line, as for ast; ``str.splitlines`` would also split
+    on form feeds and other separators that can appear inside a line.
+    """
+    return [0, *(match.end() for match in _NEWLINE.finditer(text))]
+
+
+def _apply_removals(
+    text: str,
+    offsets: List[int],
+    removals: List[Tuple[Tuple[int, int], Tuple[int, int], str]],
+) -> str:
+    """Splice (start, end, replacement) spans of (row, column) out of the text.
+
+    Lines left empty by a removal are dropped entirely.
+
+    :param offsets: Line start offsets, see _line_offsets
+    """
+
+    def line_offset(row: int) -> int:
+        return offsets[min(row, len(offsets)) - 1]
+
+    parts, position = [], 0
+    for (start_row, start_col), (end_row, end_col), replacement in removals:
+        start = line_offset(start_row) + start_col
+        end = line_offset(end_row) + end_col
+        line_start = line_offset(start_row)
+        line_end = offsets[end_row] if end_row < len(offsets) else len(text)
+        # The ";" after a docstring goes with it: "def f(): "d"; return 1"
+        separator = _STATEMENT_SEPARATOR.match(text, end)
+        if separator:
+            end = separator.end()
+        before, after = text[line_start:start], text[end:line_end]
+        if not replacement and not before.strip() and not after.strip():
+            start, end = line_start, line_end
+        elif not replacement and after.strip():
+            # What follows on the line takes the docstring's place
+            end += len(after) - len(after.lstrip(" \t"))
+        elif not replacement:
+            start -= len(before) - len(before.rstrip(" \t"))
+        if start < position:
+            continue
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+# Built-in transforms, in the order they are applied
+TRANSFORMS: Dict[str, Callable[[str, str], str]] = {
+    "license_header": remove_license_header,
+    "comments": strip_comments,
+    "docstrings": strip_docstrings,
+    "trailing_whitespace": strip_trailing_whitespace,
+    "blank_lines": collapse_blank_lines,
+}
+
+
+def _byte_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class TransformPipeline:
+    """
+    Applies the enabled content transforms to loaded files.
+
+    Each transform is a single linear pass over the file content; the bytes
+    each one removed are accumulated in ``saved``.
+    """
+
+    def __init__(self, names: Optional[Iterable[str]] = None):
+        """
+        Initialize the TransformPipeline class.
+
+        :param names: Names of the transforms to enable, see TRANSFORMS
+        :raises ValueError: If a name is not a known transform
+        """
+        names = set(names or ())
+        unknown = names - TRANSFORMS.keys()
+        if unknown:
+            raise ValueError(f"Unknown transforms: {', '.join(sorted(unknown))}")
+        self.transforms = [
+            (name, transform) for name, transform in TRANSFORMS.items() if name in names
+        ]
+        self.saved: Dict[str, int] = dict.fromkeys(
+            (name for name, _ in self.transforms), 0
+        )
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.transforms)
+
+    def apply(self, content: str, extension: str) -> str:
+        """Run the content of one file through every enabled transform."""
+        saved = []
+        size = _byte_length(content)
+        for name, transform in self.transforms:
+            content = transform(content, extension)
+            new_size = _byte_length(content)
+            saved.append((name, size - new_size))
+            size = new_size
+        with self._lock:
+            for name, count in saved:
+                self.saved[name] += count
+        return content
+
+    def format_savings(self) -> str:
+        """Summarize the bytes saved per transform."""
+        total = sum(self.saved.values())
+        details = ", ".join(f"{name} {count:,}" for name, count in self.saved.items())
+        return f"Transforms saved {total:,} bytes ({details})"
@@ -0,0 +1,3 @@
+from .service import MergeService
+
+__all__ = ["MergeService"]
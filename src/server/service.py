@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.config import Config
+from src.core import FileMerger, ProjectCache
+
+
+class MergeService:
+    """
+    A long-running merge service speaking JSON lines over a local socket.
+
+    Each request is one JSON object on its own line::
+
+        {"project_path": "...", "onefile": false, "timestamp": false,
+         "tree": true, "index": false, "symbols": false, "max_size": null,
+         "transforms": null, "mode": "write"}
+
+    In ``write`` mode the outputs are written to the project's output folder
+    and the reply is ``{"status": "ok", "outputs": [...]}``. In ``stream``
+    mode nothing is written; one ``{"path": ..., "markdown": ...}`` line is
+    sent per file section, followed by ``{"status": "ok", "files": N}``.
+    Errors are reported as ``{"status": "error", "error": "..."}``.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        config: Optional[Config] = None,
+        max_concurrent_io: int = 64,
+    ):
+        """
+        Initialize the MergeService class.
+
+        :param logger: Logger object
+        :param config: Configuration shared by all requests
+        :param max_concurrent_io: Limit on concurrent file reads across requests
+        """
+        self.logger = logger
+        self.config = config or Config(logger=logger)
+        self.io_limit = asyncio.Semaphore(max_concurrent_io)
+        self.caches: Dict[Path, ProjectCache] = {}
+        # Started on the first request that needs it, shared by all requests
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        """Shut down the worker processes shared by the requests."""
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
+
+    def _cache_for(self, project_path: Path) -> ProjectCache:
+        """Return the warm cache of a project, creating it on first use."""
+        project_path = project_path.resolve()
+        cache = self.caches.get(project_path)
+        if cache is None:
+            cache = self.caches[project_path] = ProjectCache(
+                project_path,
+                fallback_encoding=self.config.fallback_encoding,
+                io_limit=self.io_limit,
+            )
+            self.logger.info(f"Created cache for {project_path}")
+        return cache
+
+    def _merger_for(self, request: dict, cache: ProjectCache) -> FileMerger:
+        if request.get("symbols", False) and self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(max_workers=self.config.max_workers)
+        return FileMerger(
+            project_path=cache.project_path,
+            merge_onefile=request.get("onefile", False),
+            enable_timestamp=request.get("timestamp", False),
+            enable_folder_structure=request.get("tree", True),
+            enable_section_index=request.get("index", False),
+            enable_symbol_index=request.get("symbols", False),
+            max_output_size_mb=request.get("max_size"),
+            transforms=request.get("transforms"),
+            logger=self.logger,
+            config=self.config,
+            cache=cache,
+            process_pool=self.process_pool,
+        )
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, message: dict):
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def _handle_request(self, request: dict, writer: asyncio.StreamWriter):
+        project_path = Path(request["project_path"])
+        if not project_path.is_dir():
+            raise ValueError(f"Project path is not a directory: {project_path}")
+        cache = self._cache_for(project_path)
+        merger = self._merger_for(request, cache)
+
+        mode = request.get("mode", "write")
+        if mode == "stream":
+            count = 0
+            async for section in merger.iter_sections():
+                await self._send(
+                    writer,
+                    {"path": section.path.as_posix(), "markdown": section.markdown},
+                )
+                count += 1
+            await self._send(writer, {"status": "ok", "files": count})
+        elif mode == "write":
+            async with cache.lock:
+                output_files = await merger.merge_files()
+            await self._send(
+                writer,
+                {"status": "ok", "outputs": [str(path) for path in output_files]},
+            )
+        else:
+            raise ValueError(f"Unknown mode: {mode}")
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serve the requests of one client connection until it closes."""
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    await self._handle_request(json.loads(line), writer)
+                except Exception as e:
+                    self.logger.error(f"Error handling request: {str(e)}")
+                    await self._send(writer, {"status": "error", "error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_unix(self, socket_path: Path):
+        """Serve requests on a Unix domain socket until cancelled."""
+        server = await asyncio.start_unix_server(
+            self.handle_connection, path=str(socket_path)
+        )
+        self.logger.info(f"Listening on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 8765):
+        """Serve requests on a local TCP port until cancelled."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.logger.info(f"Listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
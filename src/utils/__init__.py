@@ -1,4 +1,5 @@
 from .logging_config import get_logger, setup_logging
 from .gitignore_parser import GitIgnoreParser
+from .generated_detector import GeneratedFileDetector
 
-__all__ = ["get_logger", "setup_logging", "GitIgnoreParser"]
+__all__ = ["get_logger", "setup_logging", "GitIgnoreParser", "GeneratedFileDetector"]
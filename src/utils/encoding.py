@@ -0,0 +1,88 @@
+import codecs
+from typing import Optional, Tuple
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Number of leading bytes looked at by the heuristics
+SAMPLE_SIZE = 4096
+
+
+def _detect_utf16(sample: bytes) -> Optional[str]:
+    """Guess BOM-less UTF-16 from where the NUL bytes of ASCII text fall."""
+    if len(sample) < 2:
+        return None
+    even_nuls = sample[0::2].count(0)
+    odd_nuls = sample[1::2].count(0)
+    half = len(sample) // 2
+    if odd_nuls > half * 0.4 and even_nuls < half * 0.05:
+        return "utf-16-le"
+    if even_nuls > half * 0.4 and odd_nuls < half * 0.05:
+        return "utf-16-be"
+    return None
+
+
+def decode_bytes(
+    data: bytes, fallback_encoding: Optional[str] = None
+) -> Optional[Tuple[str, str]]:
+    """
+    Decode file content, detecting its encoding.
+
+    Tries strict UTF-8 first, then byte order marks and BOM-less UTF-16, and
+    finally the fallback encoding (or cp1252/latin-1 when none is configured)
+    for text without NUL bytes. Newlines are normalized to ``\\n`` like text
+    mode reads do.
+
+    :param data: Raw file content
+    :param fallback_encoding: Encoding to use for non-UTF-8 text
+    :return: (decoded text, encoding used), or None if the data looks binary
+        or cannot be decoded
+    """
+    text, encoding = None, None
+    # NUL bytes are valid UTF-8, but mean BOM-less UTF-16 or binary data
+    if 0 not in data[:SAMPLE_SIZE]:
+        try:
+            text, encoding = data.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            pass
+
+    if text is None or text.startswith("\ufeff"):
+        for bom, bom_encoding in BOMS:
+            if data.startswith(bom):
+                try:
+                    text = data[len(bom) :].decode(bom_encoding)
+                    encoding = bom_encoding
+                except UnicodeDecodeError:
+                    return None
+                break
+
+    if text is None:
+        sample = data[:SAMPLE_SIZE]
+        utf16 = _detect_utf16(sample)
+        if utf16:
+            try:
+                text, encoding = data.decode(utf16), utf16
+            except UnicodeDecodeError:
+                return None
+        elif 0 in sample:
+            return None
+        else:
+            for candidate in (fallback_encoding, "cp1252", "latin-1"):
+                if not candidate:
+                    continue
+                try:
+                    text, encoding = data.decode(candidate), candidate
+                    break
+                except (UnicodeDecodeError, LookupError):
+                    continue
+
+    if text is None:
+        return None
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, encoding
@@ -1,7 +1,7 @@
 import fnmatch
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import aiofiles
 
@@ -36,16 +36,19 @@ class GitIgnoreParser:
             return []
 
     async def is_ignored(self, path: Path) -> bool:
+        return await self.matching_pattern(path) is not None
+
+    async def matching_pattern(self, path: Path) -> Optional[str]:
         relative_path = path.relative_to(self.base_dir)
         str_path = str(relative_path).replace("\\", "/")  # Normalize path separators
 
         for pattern in self.ignore_patterns:
             if self._match_pattern(str_path, pattern):
                 logging.debug(f"File {path} matched pattern {pattern}")
-                return True
+                return pattern
 
         logging.debug(f"File {path} is not ignored")
-        return False
+        return None
 
     def _match_pattern(self, path: str, pattern: str) -> bool:
         if pattern.startswith("*"):
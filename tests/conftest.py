@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import Config  # noqa: E402
+from src.core import FileMerger  # noqa: E402
+
+SAMPLE_FILES: Dict[str, str] = {
+    "main.py": 'from src.pkg import util\n\n\nif __name__ == "__main__":\n'
+    "    util.run()\n",
+    "src/pkg/__init__.py": "",
+    "src/pkg/util.py": 'def run():\n    """Run it."""\n    return 1\n\n\n'
+    "class Helper:\n    def help(self):\n        return 2\n",
+    "src/app.js": "import { x } from './lib';\n\nexport function start() {\n"
+    "  return x;\n}\n",
+    "src/lib.js": "export const x = 1;\n",
+    "docs/notes.txt": "Some notes.\n\nWith ```fences``` inside.\n",
+    "docs/unicode.txt": "Ünïcödé text\n",
+}
+
+
+def write_files(root: Path, files: Dict[str, str]):
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+
+@pytest.fixture
+def logger() -> logging.Logger:
+    return logging.getLogger("tests")
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> Config:
+    return Config(config_file=tmp_path / "config.json")
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    project_path = tmp_path / "project"
+    write_files(project_path, SAMPLE_FILES)
+    return project_path
+
+
+@pytest.fixture
+def make_merger(config: Config, logger: logging.Logger):
+    def make(project_path: Path, onefile: bool = True, tree: bool = True, **kwargs):
+        return FileMerger(
+            project_path,
+            merge_onefile=onefile,
+            enable_timestamp=False,
+            enable_folder_structure=tree,
+            logger=logger,
+            config=config,
+            **kwargs,
+        )
+
+    return make
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def read_outputs(output_dir: Path, pattern: str = "*.md") -> Dict[str, bytes]:
+    return {path.name: path.read_bytes() for path in sorted(output_dir.glob(pattern))}
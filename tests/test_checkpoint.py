@@ -0,0 +1,88 @@
+import asyncio
+import shutil
+
+import pytest
+
+from conftest import SAMPLE_FILES, read_outputs, run
+from src.core.checkpoint import CHECKPOINT_DIR, Checkpoint
+
+
+def _interrupt_after(monkeypatch, count):
+    """Cancel the run when the given number of sections has been journaled."""
+    add = Checkpoint.add
+    added = []
+
+    def add_then_interrupt(self, record, section):
+        if len(added) == count:
+            raise asyncio.CancelledError()
+        added.append(record.path)
+        add(self, record, section)
+
+    monkeypatch.setattr(Checkpoint, "add", add_then_interrupt)
+    return added
+
+
+@pytest.mark.parametrize(
+    "onefile, zero_copy", [(True, True), (True, False), (False, False)]
+)
+def test_resumed_run_matches_an_uninterrupted_one(
+    project, make_merger, config, monkeypatch, onefile, zero_copy
+):
+    config.zero_copy = zero_copy
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=onefile).merge_files())
+    expected = read_outputs(output_dir)
+    shutil.rmtree(output_dir)
+
+    with monkeypatch.context() as patch:
+        _interrupt_after(patch, 3)
+        with pytest.raises(asyncio.CancelledError):
+            run(
+                make_merger(
+                    project, onefile=onefile, enable_checkpoint=True
+                ).merge_files()
+            )
+    assert (output_dir / CHECKPOINT_DIR / "project" / "journal.jsonl").exists()
+
+    merger = make_merger(project, onefile=onefile, resume=True)
+    run(merger.merge_files())
+
+    assert merger.checkpoint.resumed == 3
+    assert read_outputs(output_dir) == expected
+    assert not (output_dir / CHECKPOINT_DIR).exists()
+
+
+def test_changed_files_are_not_resumed(project, make_merger, monkeypatch):
+    with monkeypatch.context() as patch:
+        journaled = _interrupt_after(patch, len(SAMPLE_FILES) - 1)
+        with pytest.raises(asyncio.CancelledError):
+            run(make_merger(project, enable_checkpoint=True).merge_files())
+
+    (project / journaled[0]).write_text("changed\n", encoding="utf-8")
+    merger = make_merger(project, resume=True)
+    run(merger.merge_files())
+
+    assert merger.checkpoint.resumed == len(SAMPLE_FILES) - 2
+    document = read_outputs(project / ".output-md")["project_codes.md"]
+    assert b"changed\n" in document
+
+
+def test_checkpoint_is_kept_when_a_folder_fails(project, make_merger):
+    merger = make_merger(project, onefile=False, enable_checkpoint=True)
+    load_records = merger._load_records
+
+    async def failing_docs(records):
+        if records and records[0].folder.as_posix() == "docs":
+            raise OSError("disk error")
+        return await load_records(records)
+
+    merger._load_records = failing_docs
+    run(merger.merge_files())
+    assert merger.checkpoint.directory.exists()
+
+    resumed = make_merger(project, onefile=False, resume=True)
+    run(resumed.merge_files())
+
+    assert resumed.checkpoint.resumed == len(SAMPLE_FILES) - 2
+    assert "project_docs.md" in read_outputs(project / ".output-md")
+    assert not resumed.checkpoint.directory.exists()
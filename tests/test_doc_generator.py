@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from conftest import run
+from src.core import (
+    FileRecord,
+    MarkdownRenderer,
+    generate_content,
+    generate_content_sections,
+)
+
+
+def _record(path: str, content: str) -> FileRecord:
+    return FileRecord(
+        path=Path(path),
+        source=Path(path),
+        extension=Path(path).suffix[1:],
+        size=len(content),
+        mtime=0.0,
+        content=content,
+    )
+
+
+def test_fence_is_longer_than_any_backtick_run():
+    renderer = MarkdownRenderer()
+    section = renderer.render_section(Path("a.md"), "md", "x\n````\ny\n")
+    assert section == "## a.md\n`````md\nx\n````\ny\n`````\n"
+    assert renderer.render_section(Path("b.py"), "py", "  x = 1  \n") == (
+        "## b.py\n```py\nx = 1\n```\n"
+    )
+
+
+def test_document_is_header_and_sections_in_path_order():
+    records = [_record("b.py", "b = 2"), _record("a.py", "a = 1")]
+    header, sections = run(generate_content_sections(Path("."), records))
+
+    assert [path for path, _ in sections] == [Path("a.py"), Path("b.py")]
+    document = run(generate_content(Path("."), records))
+    assert document == "\n".join([header, *(section for _, section in sections)])
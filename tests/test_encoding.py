@@ -0,0 +1,42 @@
+import codecs
+
+from conftest import read_outputs, run
+from src.utils.encoding import decode_bytes
+
+
+def test_utf8_and_boms():
+    assert decode_bytes("héllo".encode("utf-8")) == ("héllo", "utf-8")
+    assert decode_bytes(codecs.BOM_UTF8 + b"x") == ("x", "utf-8")
+    assert decode_bytes(codecs.BOM_UTF16_LE + "hé".encode("utf-16-le")) == (
+        "hé",
+        "utf-16-le",
+    )
+
+
+def test_bomless_utf16_and_fallbacks():
+    assert decode_bytes("plain ascii text".encode("utf-16-le"))[1] == "utf-16-le"
+    assert decode_bytes("café".encode("cp1252")) == ("café", "cp1252")
+    assert decode_bytes("café".encode("latin-1"), "latin-1") == ("café", "latin-1")
+
+
+def test_newlines_are_normalized_and_binary_is_rejected():
+    assert decode_bytes(b"a\r\nb\rc") == ("a\nb\nc", "utf-8")
+    assert decode_bytes(b"\x00\x01\x02\xff\xfe\x00\x00\x90") is None
+
+
+def test_binary_and_utf16_files_in_both_onefile_paths(tmp_path, config, make_merger):
+    project_path = tmp_path / "encodings"
+    project_path.mkdir()
+    (project_path / "data.bin.txt").write_bytes(b"\x00\x01\x02 binary")
+    (project_path / "wide.txt").write_bytes("wide text\n".encode("utf-16-le"))
+
+    outputs = []
+    for zero_copy in (True, False):
+        config.zero_copy = zero_copy
+        run(make_merger(project_path, tree=False).merge_files())
+        outputs.append(read_outputs(project_path / ".output-md"))
+
+    assert outputs[0] == outputs[1]
+    document = outputs[0]["encodings_codes.md"].decode("utf-8")
+    assert "data.bin.txt" not in document
+    assert "## wide.txt\n```txt\nwide text\n```" in document
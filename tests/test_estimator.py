@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from conftest import SAMPLE_FILES, run, write_files
+
+
+def test_estimate_counts_included_and_excluded_files(project, make_merger):
+    write_files(
+        project,
+        {
+            "README.md": "# excluded by type\n",
+            "node_modules/dep/index.js": "module.exports = 1;\n",
+            "package-lock.json": "{}\n",
+            "gen/api.pb.go": "// Code generated. DO NOT EDIT.\n" + "x" * 2048 + "\n",
+            "gen/schema.go": "// Code generated by tool. DO NOT EDIT.\n"
+            + "var x = 1\n" * 200,
+        },
+    )
+
+    report = run(make_merger(project).estimate(top_n=2, sniff_generated=True))
+
+    sizes = {
+        name: len(content.encode("utf-8")) for name, content in SAMPLE_FILES.items()
+    }
+    assert report.total.files == len(SAMPLE_FILES)
+    assert report.total.bytes == sum(sizes.values())
+    assert report.by_extension["py"].files == 3
+    assert report.by_folder[Path("src")].files == 2
+    assert len(report.largest) == 2
+    assert report.largest[0][0] == max(sizes.values())
+
+    excluded = {reason: totals.files for reason, totals in report.excluded.items()}
+    assert excluded["exclude_types: md"] == 1
+    assert excluded["generated: lockfile"] == 1
+    assert excluded["generated: .pb.go"] == 1
+    assert excluded["generated: marker comment"] == 1
+    assert excluded["exclude_folders: node_modules"] == 1
+
+
+def test_estimate_skips_files_removed_during_the_walk(project, make_merger):
+    write_files(project, {"README.md": "# excluded by type\n"})
+    merger = make_merger(project)
+    exclusion_reason = merger._exclusion_reason
+    removed = {"README.md", "docs/notes.txt"}
+
+    async def remove_then_check(file_path):
+        # The file disappears between the walk and reading its size
+        if file_path.relative_to(project).as_posix() in removed:
+            file_path.unlink()
+        return await exclusion_reason(file_path)
+
+    merger._exclusion_reason = remove_then_check
+    report = run(merger.estimate())
+
+    assert report.total.files == len(SAMPLE_FILES) - 1
+    assert not report.excluded
+
+
+def test_estimate_reads_no_content_by_default(project, make_merger, monkeypatch):
+    write_files(
+        project,
+        {
+            "package-lock.json": "{}\n",
+            "gen/schema.go": "// Code generated by tool. DO NOT EDIT.\n"
+            + "var x = 1\n" * 200,
+        },
+    )
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("estimate read file content")
+
+    monkeypatch.setattr("builtins.open", no_reads)
+    report = run(make_merger(project).estimate())
+    monkeypatch.undo()
+
+    excluded = {reason: totals.files for reason, totals in report.excluded.items()}
+    assert excluded == {"generated: lockfile": 1}
+    # Only a content sniff finds the marker comment
+    assert report.total.files == len(SAMPLE_FILES) + 1
+    assert "--estimate-sniff" in report.format()
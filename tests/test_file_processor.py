@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from conftest import run
+from src.core import FileProcessor, FileRecord
+from src.core.file_processor import SMALL_FILE_BATCH_SIZE, SMALL_FILE_SIZE
+
+
+def test_load_many_batches_small_files_and_drops_unreadable(tmp_path: Path):
+    records = []
+    for number in range(SMALL_FILE_BATCH_SIZE * 3 + 5):
+        path = tmp_path / f"f{number:04d}.txt"
+        path.write_text(f"file {number}\n", encoding="utf-8")
+        records.append(FileRecord.from_path(path, tmp_path))
+    large = tmp_path / "large.txt"
+    large.write_text("x" * (SMALL_FILE_SIZE * 2), encoding="utf-8")
+    records.append(FileRecord.from_path(large, tmp_path))
+    missing = FileRecord.from_path(records[0].source, tmp_path)
+    missing.source = tmp_path / "missing.txt"
+    records.append(missing)
+
+    loaded = run(FileProcessor().load_many(records))
+
+    assert loaded == records[:-1]
+    assert [record.content for record in loaded[:3]] == [
+        "file 0\n",
+        "file 1\n",
+        "file 2\n",
+    ]
+    assert loaded[-1].content == "x" * (SMALL_FILE_SIZE * 2)
@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import SAMPLE_FILES, read_outputs, run
+
+
+def test_folder_outputs_and_released_records(project, make_merger):
+    merger = make_merger(project, onefile=False, tree=False)
+    output_files = run(merger.merge_files())
+
+    assert sorted(path.name for path in output_files) == [
+        "project_docs.md",
+        "project_root.md",
+        "project_src-pkg.md",
+        "project_src.md",
+    ]
+    # Contents are dropped once their folder is written
+    assert merger.file_records
+    assert all(record.content is None for record in merger.file_records)
+
+    src = (merger.output_dir / "project_src.md").read_text("utf-8")
+    assert src.startswith("# src Contents\n## src/app.js\n```js\n")
+    assert "## src/pkg/util.py" not in src
+
+
+@pytest.mark.parametrize("onefile", [True, False])
+def test_files_removed_after_the_walk_are_skipped(project, make_merger, onefile):
+    merger = make_merger(project, onefile=onefile, tree=False)
+    should_process_file = merger._should_process_file
+
+    async def check_then_remove(file_path):
+        # The file disappears between the walk and reading its metadata
+        included = await should_process_file(file_path)
+        if file_path.name == "notes.txt":
+            file_path.unlink()
+        return included
+
+    merger._should_process_file = check_then_remove
+    run(merger.merge_files())
+
+    assert len(merger.file_records) == len(SAMPLE_FILES) - 1
+    document = b"".join(read_outputs(merger.output_dir).values()).decode("utf-8")
+    assert "## docs/unicode.txt" in document
+    assert "## docs/notes.txt" not in document
@@ -0,0 +1,63 @@
+import base64
+import os
+
+from conftest import SAMPLE_FILES, read_outputs, run, write_files
+from src.utils.generated_detector import GeneratedFileDetector
+
+GENERATED_FILES = {
+    "package-lock.json": '{"lockfileVersion": 3}\n',
+    "web/vendor.min.js": "var a=1;\n",
+    "api/service.pb.go": "package api\n",
+    "api/models.go": "// Code generated by sqlc. DO NOT EDIT.\n" + "var x = 1\n" * 200,
+    "web/bundle.js": "var a=" + "1+" * 2000 + "1;\n",
+    "assets/blob.txt": base64.encodebytes(os.urandom(6000)).decode("ascii"),
+    "vendor/lib.py": "def f():\n    return 1\n" * 100,
+    "vendor/keep.py": "def g():\n    return 2\n",
+}
+
+
+def test_match_name(tmp_path):
+    (tmp_path / ".gitattributes").write_text(
+        "vendor/** linguist-generated\nvendor/keep.py -linguist-generated\n"
+    )
+    detector = GeneratedFileDetector(tmp_path)
+    run(detector.initialize())
+
+    assert detector.match_name(tmp_path / "yarn.lock") == "generated: lockfile"
+    assert detector.match_name(tmp_path / "a/b.min.css") == "generated: .min.css"
+    assert detector.match_name(tmp_path / "x_pb2.py") == "generated: _pb2.py"
+    assert (
+        detector.match_name(tmp_path / "vendor/lib.py")
+        == ".gitattributes: linguist-generated"
+    )
+    # A later negated marker wins, and it overrides the name rules too
+    assert detector.match_name(tmp_path / "vendor/keep.py") is None
+    assert detector.match_name(tmp_path / "src/main.py") is None
+
+
+def test_sniff(tmp_path):
+    write_files(tmp_path, GENERATED_FILES)
+    sniff = GeneratedFileDetector.sniff
+
+    assert sniff(tmp_path / "api/models.go") == "generated: marker comment"
+    assert sniff(tmp_path / "web/bundle.js") == "generated: long lines"
+    assert sniff(tmp_path / "assets/blob.txt") == "generated: high entropy"
+    # Too short to judge
+    assert sniff(tmp_path / "web/vendor.min.js") is None
+    assert sniff(tmp_path / "vendor/lib.py") is None
+
+
+def test_generated_files_are_skipped_unless_disabled(project, make_merger, config):
+    write_files(project, GENERATED_FILES)
+    (project / ".gitattributes").write_text("vendor/lib.py linguist-generated\n")
+
+    run(make_merger(project).merge_files())
+    document = read_outputs(project / ".output-md")["project_codes.md"].decode()
+    rendered = {line[3:] for line in document.splitlines() if line.startswith("## ")}
+    assert rendered == {*SAMPLE_FILES, "vendor/keep.py", ".gitattributes"}
+
+    config.skip_generated = False
+    run(make_merger(project).merge_files())
+    document = read_outputs(project / ".output-md")["project_codes.md"].decode()
+    rendered = {line[3:] for line in document.splitlines() if line.startswith("## ")}
+    assert rendered == {*SAMPLE_FILES, *GENERATED_FILES, ".gitattributes"}
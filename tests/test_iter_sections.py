@@ -0,0 +1,42 @@
+from conftest import SAMPLE_FILES, run
+
+
+async def _collect(merger, **kwargs):
+    return [section async for section in merger.iter_sections(**kwargs)]
+
+
+def test_sections_match_the_onefile_output(project, make_merger):
+    sections = run(_collect(make_merger(project)))
+
+    assert [section.path.as_posix() for section in sections] == sorted(SAMPLE_FILES)
+    for section in sections:
+        assert section.content == SAMPLE_FILES[section.path.as_posix()]
+        assert section.language == section.path.suffix[1:]
+
+    run(make_merger(project).merge_files())
+    document = (project / ".output-md" / "project_codes.md").read_text("utf-8")
+    assert document.endswith("\n".join(section.markdown for section in sections))
+
+
+def test_small_read_ahead_yields_the_same_sections(project, make_merger):
+    expected = run(_collect(make_merger(project)))
+    sections = run(_collect(make_merger(project), read_ahead=2))
+
+    assert [section.markdown for section in sections] == [
+        section.markdown for section in expected
+    ]
+
+
+def test_stopping_early_writes_nothing(project, make_merger):
+    async def first_two(merger):
+        sections = []
+        async for section in merger.iter_sections(read_ahead=1):
+            sections.append(section)
+            if len(sections) == 2:
+                break
+        return sections
+
+    sections = run(first_two(make_merger(project)))
+
+    assert len(sections) == 2
+    assert not list((project / ".output-md").glob("*.md"))
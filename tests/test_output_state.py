@@ -0,0 +1,113 @@
+import shutil
+
+from conftest import read_outputs, run
+from src.core.output_state import STATE_FILE, OutputState, fingerprint, write_atomic
+from src.core.splice import scan_file
+
+
+def _mtimes(output_dir):
+    return {path.name: path.stat().st_mtime_ns for path in output_dir.glob("*.md")}
+
+
+def test_write_atomic_skips_identical_content(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"  body\n")
+    section = scan_file(source, b"<", b">")
+    output_file = tmp_path / "out.md"
+
+    assert write_atomic(output_file, [b"head ", section])
+    assert output_file.read_bytes() == b"head <body>"
+    assert not write_atomic(output_file, [b"head ", section])
+    assert write_atomic(output_file, [b"head!", section])
+    assert output_file.read_bytes() == b"head!<body>"
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == ".tmp"] == []
+
+
+def test_fingerprint_uses_the_digest_of_spliced_sections(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_bytes(b"body")
+    section = scan_file(source, b"", b"")
+    assert fingerprint([b"a", section]) == fingerprint([b"a", section])
+    assert fingerprint([b"a", section]) != fingerprint([b"a", b"body"])
+
+
+def test_second_run_leaves_current_outputs_alone(project, make_merger):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=False).merge_files())
+    before = _mtimes(output_dir)
+    contents = read_outputs(output_dir)
+
+    merger = make_merger(project, onefile=False)
+    run(merger.merge_files())
+
+    assert merger.writer.written == 0
+    assert merger.writer.unchanged == len(before)
+    assert _mtimes(output_dir) == before
+    assert read_outputs(output_dir) == contents
+
+
+def test_outputs_of_removed_folders_are_deleted(project, make_merger):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=False).merge_files())
+    assert (output_dir / "project_docs.md").exists()
+
+    shutil.rmtree(project / "docs")
+    run(make_merger(project, onefile=False).merge_files())
+
+    assert not (output_dir / "project_docs.md").exists()
+    assert (output_dir / "project_src.md").exists()
+    state = OutputState(output_dir)
+    run(state.load())
+    assert "project_docs.md" not in state.entries
+
+
+def test_outputs_are_kept_when_a_folder_fails(project, make_merger):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=False).merge_files())
+    before = read_outputs(output_dir)
+
+    shutil.rmtree(project / "src" / "pkg")
+    merger = make_merger(project, onefile=False)
+    load_records = merger._load_records
+
+    async def failing_docs(records):
+        if records and records[0].folder.as_posix() == "docs":
+            raise OSError("disk error")
+        return await load_records(records)
+
+    merger._load_records = failing_docs
+    run(merger.merge_files())
+
+    after = read_outputs(output_dir)
+    assert after["project_docs.md"] == before["project_docs.md"]
+    # Stale outputs are only removed after a run without failures
+    assert "project_src-pkg.md" in after
+
+
+def test_outputs_are_kept_when_loading_a_folder_fails(project, make_merger):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=False).merge_files())
+    before = read_outputs(output_dir)
+
+    merger = make_merger(project, onefile=False)
+    load_many = merger.file_processor.load_many
+
+    async def failing_docs(records):
+        if records and records[0].folder.as_posix() == "docs":
+            raise RuntimeError("executor shut down")
+        return await load_many(records)
+
+    merger.file_processor.load_many = failing_docs
+    run(merger.merge_files())
+
+    assert read_outputs(output_dir)["project_docs.md"] == before["project_docs.md"]
+    assert not merger.remove_stale_outputs
+
+
+def test_onefile_and_folder_outputs_are_tracked_separately(project, make_merger):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=False).merge_files())
+    run(make_merger(project, onefile=True).merge_files())
+
+    assert {"project_codes.md", "project_docs.md"} <= set(read_outputs(output_dir))
+    assert (output_dir / STATE_FILE).exists()
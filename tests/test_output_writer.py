@@ -0,0 +1,42 @@
+import json
+
+from conftest import read_outputs, run
+
+
+def test_parts_hold_the_same_sections_as_a_single_output(project, make_merger):
+    merger = make_merger(project, tree=False)
+    run(merger.merge_files())
+    single = (merger.output_dir / "project_codes.md").read_bytes()
+
+    merger = make_merger(project, tree=False, max_output_size_mb=200 / 1024 / 1024)
+    part_files = run(merger.merge_files())
+
+    assert len(part_files) > 1
+    assert not (merger.output_dir / "project_codes.md").exists()
+    manifest = json.loads(
+        (merger.output_dir / "project_codes.manifest.json").read_text("utf-8")
+    )
+    assert [part["file"] for part in manifest["parts"]] == [
+        path.name for path in part_files
+    ]
+
+    bodies = []
+    for number, part_file in enumerate(part_files, 1):
+        data = part_file.read_bytes()
+        header, body = data.split(b"\n", 1)
+        assert header.endswith(f"(part {number}/{len(part_files)})".encode("ascii"))
+        assert len(data) == manifest["parts"][number - 1]["bytes"]
+        bodies.append(body)
+    assert b"\n".join(bodies) == single.split(b"\n", 1)[1]
+
+
+def test_no_rolling_by_default(project, make_merger):
+    merger = make_merger(project, onefile=False, tree=False)
+    run(merger.merge_files())
+    assert not list(merger.output_dir.glob("*.part*"))
+    assert set(read_outputs(merger.output_dir)) == {
+        "project_root.md",
+        "project_docs.md",
+        "project_src.md",
+        "project_src-pkg.md",
+    }
@@ -0,0 +1,33 @@
+import hashlib
+from pathlib import Path
+
+from conftest import run
+from src.core import SectionIndex
+
+
+def test_entries_point_at_their_sections(project, make_merger):
+    merger = make_merger(project, enable_section_index=True)
+    run(merger.merge_files())
+
+    output_file = merger.output_dir / "project_codes.md"
+    data = output_file.read_bytes()
+    lines = data.split(b"\n")
+    index = run(SectionIndex.load(output_file))
+
+    assert len(index.entries) == 7
+    for path, offset, length, line_start, line_end, digest in index.entries:
+        section = data[offset : offset + length]
+        assert section.startswith(f"## {path}\n".encode("utf-8"))
+        assert hashlib.sha1(section).hexdigest() == digest
+        assert lines[line_start - 1] == f"## {path}".encode("utf-8")
+        assert lines[line_end - 1].startswith(b"```")
+
+
+def test_lookup_by_path(project, make_merger):
+    merger = make_merger(project, enable_section_index=True)
+    run(merger.merge_files())
+    index = run(SectionIndex.load(merger.output_dir / "project_codes.md"))
+
+    for entry in index.entries:
+        assert index.lookup(Path(entry[0])) is entry
+    assert index.lookup(Path("missing.py")) is None
@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+
+from conftest import SAMPLE_FILES, read_outputs, run
+from src.core.estimator import estimate_tokens
+from src.core.file_record import FileRecord
+from src.core.selection import (
+    ImportGraph,
+    fill_budget,
+    rank_records,
+    select_records,
+)
+
+# The entry point and every file imported by another file
+CONNECTED = ["main.py", "src/pkg/__init__.py", "src/pkg/util.py", "src/lib.js"]
+
+
+def _records(project):
+    # Equal modification times leave only the import graph to rank by
+    for name in SAMPLE_FILES:
+        os.utime(project / name, (1_000_000_000, 1_000_000_000))
+    return [FileRecord.from_path(project / name, project) for name in SAMPLE_FILES]
+
+
+def test_import_graph_edges_and_entry_points(project):
+    graph = ImportGraph(_records(project))
+    run(graph.build())
+
+    assert graph.entry_points == {"main.py"}
+    assert graph.edges["main.py"] == {"src/pkg/util.py", "src/pkg/__init__.py"}
+    assert graph.edges["src/app.js"] == {"src/lib.js"}
+    assert graph.entry_point_distance()["src/pkg/util.py"] == 1
+
+
+def test_ranking_prefers_the_entry_point_and_its_imports(project):
+    graph = ImportGraph(_records(project))
+    run(graph.build())
+    ranked = [record.path.as_posix() for _, record in rank_records(graph)]
+
+    assert ranked[0] == "src/lib.js"
+    assert set(ranked[1:3]) == {"src/pkg/util.py", "src/pkg/__init__.py"}
+    # The entry point outranks files nothing imports
+    assert ranked[3] == "main.py"
+
+
+def test_fill_budget_never_exceeds_the_budget(project):
+    ranked = [(0.0, record) for record in _records(project)]
+    for budget in (0, 10, 50, 200, 10_000):
+        for unit, cost in (("bytes", lambda size: size), ("tokens", estimate_tokens)):
+            selected = fill_budget(ranked, budget, unit)
+            assert sum(cost(record.size) for record in selected) <= budget
+    assert len(fill_budget(ranked, 10_000, "bytes")) == len(SAMPLE_FILES)
+
+
+def test_selection_keeps_original_order_and_caches_imports(project, tmp_path):
+    records = _records(project)
+    cache_file = tmp_path / "imports.json"
+    budget = sum(r.size for r in records if r.path.as_posix() in CONNECTED)
+    logger = logging.getLogger("tests")
+
+    selected = run(select_records(records, budget, "bytes", cache_file, logger))
+
+    assert [r.path.as_posix() for r in selected] == CONNECTED
+    assert cache_file.exists()
+    again = run(select_records(records, budget, "bytes", cache_file, logger))
+    assert again == selected
+
+
+def test_budgeted_run_only_renders_selected_files(project, make_merger):
+    budget = sum(
+        estimate_tokens(record.size)
+        for record in _records(project)
+        if record.path.as_posix() in CONNECTED
+    )
+    run(make_merger(project, budget=(budget, "tokens")).merge_files())
+    document = read_outputs(project / ".output-md")["project_codes.md"].decode()
+
+    rendered = [line[3:] for line in document.splitlines() if line.startswith("## ")]
+    assert sorted(rendered) == sorted(CONNECTED)
+
+
+def test_unreadable_import_cache_is_rebuilt(project, tmp_path):
+    records = _records(project)
+    cache_file = tmp_path / "imports.json"
+    graph = ImportGraph(records, cache_file)
+    run(graph.build())
+    edges = graph.edges
+    complete = cache_file.read_bytes()
+
+    for broken in (
+        complete[: len(complete) // 2],
+        b"[]",
+        b'{"version": 1, "files": {"a": 1}}',
+    ):
+        cache_file.write_bytes(broken)
+        graph = ImportGraph(records, cache_file)
+        run(graph.build())
+        assert graph.edges == edges
+        assert json.loads(cache_file.read_bytes()) == json.loads(complete)
+    assert not list(tmp_path.glob("*.tmp"))
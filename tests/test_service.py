@@ -0,0 +1,98 @@
+import asyncio
+import json
+import shutil
+
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import SAMPLE_FILES, read_outputs, run
+from src.core import symbol_index
+from src.server import MergeService, service as service_module
+
+
+async def _exchange(service, requests):
+    """Send requests over one connection and collect every reply line."""
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        replies = []
+        for request in requests:
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            while True:
+                reply = json.loads(await reader.readline())
+                replies.append(reply)
+                if "status" in reply:
+                    break
+        writer.close()
+        await writer.wait_closed()
+    return replies
+
+
+def test_write_requests_match_a_direct_run(project, make_merger, config, logger):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=False).merge_files())
+    expected = read_outputs(output_dir)
+    shutil.rmtree(output_dir)
+
+    service = MergeService(logger, config=config)
+    request = {"project_path": str(project), "onefile": False}
+    first, second = run(_exchange(service, [request, request]))
+
+    assert first["status"] == second["status"] == "ok"
+    assert sorted(first["outputs"]) == sorted(str(output_dir / n) for n in expected)
+    assert read_outputs(output_dir) == expected
+    # Both requests shared the warm cache of the project
+    assert list(service.caches) == [project.resolve()]
+
+
+def test_stream_request_sends_one_line_per_section(project, config, logger):
+    service = MergeService(logger, config=config)
+    replies = run(
+        _exchange(service, [{"project_path": str(project), "mode": "stream"}])
+    )
+
+    *sections, status = replies
+    assert status == {"status": "ok", "files": len(SAMPLE_FILES)}
+    assert [section["path"] for section in sections] == sorted(SAMPLE_FILES)
+    assert all(section["markdown"] for section in sections)
+    assert not (project / ".output-md" / "project_codes.md").exists()
+
+
+def test_errors_are_reported_and_the_connection_stays_open(project, config, logger):
+    service = MergeService(logger, config=config)
+    replies = run(
+        _exchange(
+            service,
+            [
+                {"project_path": str(project / "missing")},
+                {"project_path": str(project), "mode": "bogus"},
+                {"project_path": str(project), "mode": "stream"},
+            ],
+        )
+    )
+
+    assert replies[0]["status"] == "error"
+    assert "not a directory" in replies[0]["error"]
+    assert replies[1] == {"status": "error", "error": "Unknown mode: bogus"}
+    assert replies[-1]["status"] == "ok"
+
+
+def test_requests_share_the_worker_processes(project, config, logger, monkeypatch):
+    started = []
+
+    class Pool(ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            super().__init__(max_workers)
+            started.append(self)
+
+    monkeypatch.setattr(symbol_index, "PROCESS_POOL_THRESHOLD", 1)
+    monkeypatch.setattr(service_module, "ProcessPoolExecutor", Pool)
+    service = MergeService(logger, config=config)
+    request = {"project_path": str(project), "onefile": False, "symbols": True}
+    replies = run(_exchange(service, [request, request]))
+
+    assert [reply["status"] for reply in replies] == ["ok", "ok"]
+    assert len(started) == 1
+    service.close()
+    assert started[0]._shutdown
@@ -0,0 +1,42 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from conftest import read_outputs, run
+from src.core.file_merger import MergeException
+from src.core.sharding import parse_shard, shard_of
+
+
+def test_parse_shard():
+    assert parse_shard("2/8") == (2, 8)
+    for value in ("0/2", "3/2", "2", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_shard_of_is_stable_and_in_range():
+    path = Path("src/pkg/util.py")
+    assert shard_of(path, 4) == shard_of(Path("src") / "pkg" / "util.py", 4)
+    assert all(1 <= shard_of(Path(f"f{i}.py"), 3) <= 3 for i in range(50))
+
+
+@pytest.mark.parametrize("onefile", [True, False])
+def test_merged_shards_match_a_single_run(project, make_merger, onefile):
+    output_dir = project / ".output-md"
+    run(make_merger(project, onefile=onefile).merge_files())
+    expected = read_outputs(output_dir)
+    shutil.rmtree(output_dir)
+
+    for number in (1, 2, 3):
+        run(make_merger(project, onefile=onefile, shard=(number, 3)).merge_files())
+    assert not read_outputs(output_dir)
+    run(make_merger(project, onefile=onefile).merge_shards())
+
+    assert read_outputs(output_dir) == expected
+
+
+def test_merge_shards_requires_every_shard(project, make_merger):
+    run(make_merger(project, shard=(1, 2)).merge_files())
+    with pytest.raises(MergeException, match="Missing shards"):
+        run(make_merger(project).merge_shards())
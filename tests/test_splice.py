@@ -0,0 +1,74 @@
+from conftest import SAMPLE_FILES, read_outputs, run, write_files
+from src.core.file_processor import SMALL_FILE_BATCH_SIZE, SMALL_FILE_SIZE
+from src.core.splice import SplicedSection, scan_file
+
+SPLICE_CASES = {
+    "plain.py": "print('hi')\n",
+    "padded.txt": "\n\n   body   \n\n",
+    "crlf.txt": "one\r\ntwo\r\n",
+    "fence.md.txt": "```\ncode\n```\n",
+    "latin1.txt": None,
+}
+
+
+def test_onefile_output_is_identical_with_and_without_zero_copy(
+    tmp_path, config, make_merger
+):
+    project_path = tmp_path / "splice"
+    write_files(project_path, SAMPLE_FILES)
+    write_files(project_path, {k: v for k, v in SPLICE_CASES.items() if v})
+    (project_path / "latin1.txt").write_bytes("caf\xe9\n".encode("latin-1"))
+
+    config.zero_copy = True
+    run(make_merger(project_path).merge_files())
+    spliced = read_outputs(project_path / ".output-md")
+
+    config.zero_copy = False
+    run(make_merger(project_path).merge_files())
+    decoded = read_outputs(project_path / ".output-md")
+
+    assert spliced == decoded
+
+
+def test_scan_file_trims_and_rejects(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"\n  body\n\n")
+    section = scan_file(path, b"## a.txt\n```txt\n", b"\n```\n")
+    assert isinstance(section, SplicedSection)
+    assert (section.start, section.end) == (3, 7)
+    assert len(section) == len(b"## a.txt\n```txt\nbody\n```\n")
+
+    path.write_bytes(b"has ``` a fence\n")
+    assert scan_file(path, b"", b"") is None
+    path.write_bytes(b"\xff\xfe invalid utf-8")
+    assert scan_file(path, b"", b"") is None
+
+
+def test_small_files_are_scanned_in_batches(tmp_path, config, make_merger):
+    project_path = tmp_path / "many"
+    files = {
+        f"f{i:03}.txt": f"file {i}\n" for i in range(2 * SMALL_FILE_BATCH_SIZE + 5)
+    }
+    files["large.txt"] = "some text\n" * (SMALL_FILE_SIZE // 10 + 1)
+    files["fence.txt"] = "```\ncode\n```\n"
+    write_files(project_path, files)
+
+    outputs = []
+    for zero_copy in (True, False):
+        config.zero_copy = zero_copy
+        merger = make_merger(project_path, tree=False)
+        run_io = merger.file_processor.run_io
+        calls = []
+
+        async def counting_run_io(func, *args):
+            calls.append(func.__name__)
+            return await run_io(func, *args)
+
+        merger.file_processor.run_io = counting_run_io
+        run(merger.merge_files())
+        outputs.append(read_outputs(project_path / ".output-md"))
+        if zero_copy:
+            # Three batches of small files and one task for the large file
+            assert calls.count("_scan_batch") == 4
+
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,117 @@
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from conftest import run, write_files
+from src.core import output_writer, symbol_index
+from src.core.symbol_index import SymbolIndex, extract_symbols
+
+C_SOURCE = b"""#include <stdio.h>
+#define MAX_SIZE 16
+
+struct point {
+    int x;
+};
+
+static const char *name_of(int kind)
+{
+    return "x";
+}
+
+unsigned long **table_at(size_t i) {
+    if (i) {
+        return 0;
+    }
+}
+
+std::vector<int> &items_of(const Widget& w) const {
+}
+/****************************************
+ ** Frees the table (see table_at())
+ ****************************************/
+int main(int argc, char **argv)
+{
+    return 0;
+}
+"""
+
+
+def test_c_symbols():
+    symbols = [
+        (name, kind, line) for name, kind, line, _ in extract_symbols(C_SOURCE, "c")
+    ]
+    assert symbols == [
+        ("MAX_SIZE", "macro", 1),
+        ("point", "type", 3),
+        ("name_of", "function", 7),
+        ("table_at", "function", 12),
+        ("items_of", "function", 18),
+        ("main", "function", 23),
+    ]
+
+
+def test_c_tagger_runs_in_bounded_time(tmp_path):
+    # These lines took exponential time with overlapping character classes
+    lines = [
+        b"x" + b"&*" * 14,
+        b"**** " * 6,
+        b"/*\n" + b"*" * 40 + b"\n*/",
+        b"int " + b"* & " * 20 + b"f(",
+    ]
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(Path(__file__).resolve().parent.parent)!r})\n"
+        "from src.core.symbol_index import extract_symbols\n"
+        f"for line in {lines!r}:\n"
+        "    extract_symbols(line * 3 + b'\\n', 'c')\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=10)
+
+
+def test_symbol_index_points_at_definitions(project, make_merger):
+    write_files(project, {"native/lib.c": C_SOURCE.decode("utf-8")})
+    run(make_merger(project, tree=False, enable_symbol_index=True).merge_files())
+    output_file = project / ".output-md" / "project_codes.md"
+    document = output_file.read_bytes()
+
+    index = run(SymbolIndex.load(output_file))
+    data = json.loads(SymbolIndex.index_path(output_file).read_bytes())
+    assert data["files"] == ["native/lib.c", "src/app.js", "src/pkg/util.py"]
+
+    lines = document.split(b"\n")
+    for name, expected in (
+        ("run", b"def run():"),
+        ("Helper.help", b"    def help(self):"),
+        ("start", b"export function start() {"),
+        ("table_at", b"unsigned long **table_at(size_t i) {"),
+    ):
+        ((_, _, _, line, offset),) = index.lookup(name)
+        assert lines[line - 1] == expected
+        assert document[offset:].startswith(expected)
+    assert index.lookup("missing") == []
+
+
+def test_worker_processes_are_started_once_per_merger(
+    project, make_merger, monkeypatch
+):
+    started = []
+
+    class Pool(ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            super().__init__(max_workers)
+            started.append(self)
+
+    monkeypatch.setattr(symbol_index, "PROCESS_POOL_THRESHOLD", 1)
+    monkeypatch.setattr(symbol_index, "ProcessPoolExecutor", None)
+    monkeypatch.setattr(output_writer, "ProcessPoolExecutor", Pool)
+    merger = make_merger(project, onefile=False, enable_symbol_index=True)
+    # Two folders with Python files, each written with its symbol index
+    run(merger.merge_files())
+    output_dir = project / ".output-md"
+    assert len(list(output_dir.glob("*.symbols.json"))) >= 2
+
+    merger.close()
+    assert len(started) == 1
+    assert started[0]._shutdown
@@ -0,0 +1,98 @@
+import ast
+
+import pytest
+
+from conftest import read_outputs, run, write_files
+from src.core.transforms import (
+    TransformPipeline,
+    collapse_blank_lines,
+    remove_license_header,
+    strip_comments,
+    strip_docstrings,
+    strip_trailing_whitespace,
+)
+
+
+def test_strip_docstrings():
+    text = (
+        '"""Module."""\nimport os\n\n\nclass A:\n    """Only a docstring."""\n\n\n'
+        'def f(x):\n    """Doc with "quotes" and ünïcode."""\n    return x\n'
+    )
+    assert strip_docstrings(text, "py") == (
+        "import os\n\n\nclass A:\n    ...\n\n\ndef f(x):\n    return x\n"
+    )
+    assert strip_docstrings(text, "txt") == text
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('def f(): """d"""; return 1\n', "def f(): return 1\n"),
+        ('def f():\n    """d"""; return 1\n', "def f():\n    return 1\n"),
+        ('class A: """d""" ; x = 1\n', "class A: x = 1\n"),
+        ('def f():\n    """d""";\n    return 1\n', "def f():\n    return 1\n"),
+        ('def f(): """d""";\n', "def f(): ...\n"),
+        (
+            'def f():\n    """d"""  # note\n    return 1\n',
+            "def f():\n    # note\n    return 1\n",
+        ),
+    ],
+)
+def test_strip_docstrings_sharing_a_line(text, expected):
+    result = strip_docstrings(text, "py")
+    assert result == expected
+    ast.parse(result)
+
+
+def test_strip_docstrings_after_a_form_feed():
+    text = 'x = 1\n\x0c\ndef f():\n    """Doc."""\n    return 2'
+    assert strip_docstrings(text, "py") == "x = 1\n\x0c\ndef f():\n    return 2"
+
+
+@pytest.mark.parametrize("separator", ["\x0c", "\x1c", "\x85", "\u2028"])
+def test_strip_docstrings_only_splits_lines_on_newlines(separator):
+    text = f'a = "{separator}"\ndef f():\n    """Doc."""\n    return 2\n'
+    assert (
+        strip_docstrings(text, "py") == f'a = "{separator}"\ndef f():\n    return 2\n'
+    )
+
+
+def test_strip_comments_keeps_strings():
+    js = 'const url = "http://x"; // trailing\n// whole line\n/* block */ let a = 1;\n'
+    assert strip_comments(js, "js") == 'const url = "http://x";\n let a = 1;\n'
+
+    py = '#!/usr/bin/env python\n# comment\ns = "# not a comment"  # trailing\n'
+    assert strip_comments(py, "py") == '#!/usr/bin/env python\ns = "# not a comment"\n'
+
+
+def test_remove_license_header():
+    text = "# Copyright 2024 Example\n# Licensed under MIT\n\nimport os\n"
+    assert remove_license_header(text, "py") == "import os\n"
+    plain = "# Helpers for os\n\nimport os\n"
+    assert remove_license_header(plain, "py") == plain
+
+
+def test_whitespace_transforms():
+    assert strip_trailing_whitespace("a  \nb\t\n", "txt") == "a\nb\n"
+    assert collapse_blank_lines("a\n\n\n\n\nb\n", "txt") == "a\n\nb\n"
+
+
+def test_pipeline_counts_saved_bytes():
+    with pytest.raises(ValueError, match="Unknown transforms: bogus"):
+        TransformPipeline(["bogus"])
+
+    pipeline = TransformPipeline(["trailing_whitespace", "blank_lines"])
+    assert pipeline.apply("a  \n\n\n\nb", "txt") == "a\n\nb"
+    assert pipeline.saved == {"trailing_whitespace": 2, "blank_lines": 2}
+    assert not TransformPipeline()
+
+
+def test_transforms_apply_to_rendered_output(tmp_path, make_merger):
+    project = tmp_path / "project"
+    write_files(project, {"mod.py": 'def f():\n    """Doc."""\n    return 1\n'})
+
+    run(make_merger(project, tree=False, transforms=["docstrings"]).merge_files())
+    document = read_outputs(project / ".output-md")["project_codes.md"].decode()
+
+    assert "def f():\n    return 1\n" in document
+    assert "Doc." not in document